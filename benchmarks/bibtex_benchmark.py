@@ -0,0 +1,137 @@
+"""
+Compares the BibTexParser.get_df of slr_helper 0.1.0 with the current implementation (parallel entry normalization and
+vectorized derivations) on a synthetic BibTeX library and checks that both produce the same frame. Refcounts are not
+retrieved.
+
+Usage: python benchmarks/bibtex_benchmark.py [--entries 10000] [--workers N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+
+from ieee_csv_benchmark import duplicate_of
+from pybtex.database.input import bibtex
+
+from slr_helper.parsers.bibtex_parser import BibTexParser, create_dict_from_bibentry, calculate_numpages, \
+    bibtex_time_to_datetime, check_year, check_month, clean_isxn
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+          'November', 'December']
+
+
+def write_bibtex(file_url, entries, seed=0, duplicate_rate=0.0):
+    rng = random.Random(seed)
+    with open(file_url, 'w') as file:
+        file.write('@string{ieee = "IEEE"}\n\n')
+        for entry in range(entries):
+            i = duplicate_of(rng, entry, duplicate_rate)
+            year = rng.randint(1990, 2021)
+            kind, venue = rng.choice([('article', 'journal = {Journal of Things %d}' % (i % 40)),
+                                      ('inproceedings', 'booktitle = {Proceedings of Conf %d}' % (i % 60))])
+            start = rng.randint(1, 900)
+            fields = [f'title = {{Paper {{N}}umber {i}}}',
+                      'author = {Doe, John and Smith, Anna Maria and van Dyke, Dick}',
+                      venue,
+                      f'year = {{{year}}}' if rng.random() > 0.02 else '',
+                      f'month = {{{rng.choice(MONTHS)}}}' if rng.random() > 0.5 else '',
+                      f'pages = {{{start}–{start + rng.randint(0, 20)}}}' if rng.random() > 0.2 else '',
+                      f'numpages = {{{rng.randint(1, 20)}}}' if rng.random() > 0.7 else '',
+                      f'issue_date = {{{rng.choice(MONTHS)} {year}}}' if rng.random() > 0.5 else '',
+                      f'doi = {{10.1145/{i}}}',
+                      f'url = {{https://doi.org/10.1145/{i}}}',
+                      f'isbn = {{978-1-4503-{i}}}' if rng.random() > 0.5 else '',
+                      'issn = {1234-5678}' if rng.random() > 0.5 else '',
+                      'publisher = ieee',
+                      'abstract = {' + 'Lorem ipsum dolor sit amet. ' * 10 + '}',
+                      'keywords = {systematic review, automation}']
+            body = ',\n  '.join(field for field in fields if field)
+            file.write(f'@{kind}{{key{entry},\n  {body}\n}}\n\n')
+
+
+def legacy_get_df(parser, file_url):
+    """
+    BibTexParser.get_df of slr_helper 0.1.0 without refcounts and warnings.
+    """
+    bibdata = bibtex.Parser().parse_file(file_url)
+
+    fields = []
+    for bib_id in bibdata.entries:
+        for field in bibdata.entries[bib_id].fields.keys():
+            if field not in fields:
+                fields.append(field)
+    for key in parser.bibtex_rename_map.keys():
+        if key not in fields and key != 'authors':
+            fields.append(key)
+
+    bib_df = pd.DataFrame.from_dict(
+        [create_dict_from_bibentry(bibdata.entries[bib_id], fields) for bib_id in bibdata.entries])
+
+    def get_published_in(x):
+        if 'journal' in x and x['journal'] != '':
+            return x['journal']
+        if 'booktitle' in x and x['booktitle'] != '':
+            return x['booktitle']
+        return ''
+
+    bib_df['published_in'] = bib_df.apply(get_published_in, axis=1)
+
+    def _get_page(x, pos=0):
+        val = str(x).split('–')[pos]
+        if val == "":
+            return -1
+        try:
+            return int(val)
+        except ValueError:
+            return -2
+
+    bib_df['start_page'] = bib_df.pages.apply(lambda x: _get_page(x, 0))
+    bib_df['end_page'] = bib_df.pages.apply(lambda x: _get_page(x, -1))
+    bib_df['numpages'] = bib_df.apply((lambda x: int(x['numpages']) if x['numpages'] else calculate_numpages(x)),
+                                      axis=1)
+    bib_df['date'] = bib_df.issue_date.apply(bibtex_time_to_datetime)
+    bib_df['day'] = 0
+    bib_df['year'] = bib_df.apply(check_year, axis=1)
+    bib_df['month'] = bib_df.apply(check_month, axis=1)
+
+    bib_df.isbn = bib_df.isbn.fillna("Unknown")
+    bib_df.issn = bib_df.issn.fillna("Unknown")
+    bib_df.isbn = bib_df.isbn.apply(clean_isxn)
+    bib_df.issn = bib_df.issn.apply(clean_isxn)
+    bib_df['refcount'] = -1
+    return bib_df[parser.target_columns]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--entries', type=int, default=10000)
+    arg_parser.add_argument('--workers', type=int, default=None)
+    args = arg_parser.parse_args()
+
+    parser = BibTexParser(get_refcount=False, workers=args.workers)
+    with tempfile.TemporaryDirectory() as directory:
+        file_url = os.path.join(directory, 'library.bib')
+        write_bibtex(file_url, args.entries)
+
+        old, old_time = timed(legacy_get_df, parser, file_url)
+        new, new_time = timed(parser.get_df, file_url)
+
+    # Entries without year and issue_date got NaN in 0.1.0 (a missing date was NaT, which is truthy in check_year),
+    # now they get 0 as intended by check_year.
+    old['year'] = old['year'].fillna(0).astype(int)
+    pd.testing.assert_frame_equal(old, new)
+    print(f'entries: {args.entries}')
+    print(f'legacy:   {old_time:.3f} s')
+    print(f'parallel: {new_time:.3f} s ({old_time / new_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares the memory usage of the default and the compact schema (see slr_helper.schema) on a synthetic IEEE Xplore
+CSV export and checks that deduplication and FrameQuality give the same results on both.
+
+Usage: python benchmarks/compact_memory_benchmark.py [--rows 100000]
+"""
+import argparse
+import os
+import tempfile
+
+from ieee_csv_benchmark import write_ieee_csv
+
+from slr_helper import IeeeCsvParser, FrameQuality, Util
+from slr_helper.schema import get_string_dtype
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_url = os.path.join(directory, 'export.csv')
+        write_ieee_csv(file_url, args.rows)
+        default = IeeeCsvParser().get_df(file_url)
+        compact = IeeeCsvParser(compact=True).get_df(file_url)
+
+    core = default.sample(min(100, len(default)), random_state=0)
+    assert FrameQuality(core).get_core_coverage(default) == FrameQuality(core).get_core_coverage(compact)
+    assert Util.find_duplicate_indices(default.iloc[::2]) == Util.find_duplicate_indices(compact.iloc[::2])
+
+    print(f'rows: {args.rows} (strings: {get_string_dtype()})')
+    print(f'default: {megabytes(default):8.1f} MiB')
+    print(f'compact: {megabytes(compact):8.1f} MiB ({megabytes(default) / megabytes(compact):.1f}x smaller)')
+    for col in default.columns:
+        print(f'  {col:<14}{default[col].memory_usage(deep=True) / 2 ** 20:8.1f} -> '
+              f'{compact[col].memory_usage(deep=True) / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
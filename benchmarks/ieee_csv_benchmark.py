@@ -0,0 +1,124 @@
+"""
+Compares the row-wise IeeeCsvParser.get_df of slr_helper 0.1.0 with the current columnar implementation on a synthetic
+IEEE Xplore CSV export and checks that both produce the same frame.
+
+Usage: python benchmarks/ieee_csv_benchmark.py [--rows 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+
+from slr_helper.parsers.ieee_csv_parser import IeeeCsvParser, ieee_time_to_datetime, clean_page_nr, get_numpages, \
+    clean_isxn
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def random_date(rng, year, missing_rate=0.3):
+    if rng.random() < missing_rate:
+        return ''
+    return f'{rng.randint(1, 28)} {rng.choice(MONTHS)} {year + rng.choice([0, 0, 0, 1])}'
+
+
+def duplicate_of(rng, i, duplicate_rate):
+    """
+    :return: the number of the paper exported as i-th record: i or, with probability duplicate_rate, a previous one.
+    """
+    if duplicate_rate and i and rng.random() < duplicate_rate:
+        return rng.randrange(i)
+    return i
+
+
+def write_ieee_csv(file_url, rows, seed=0, duplicate_rate=0.0):
+    rng = random.Random(seed)
+    records = []
+    for record in range(rows):
+        i = duplicate_of(rng, record, duplicate_rate)
+        year = rng.randint(1990, 2021)
+        start = rng.choice([rng.randint(1, 900), '', 'xii'])
+        end = start + rng.randint(0, 20) if isinstance(start, int) else ''
+        records.append({
+            'Document Title': f'Paper {i}',
+            'Authors': 'J. Doe; A. Smith',
+            'Publication Title': f'Conference {i % 50}',
+            'Date Added To Xplore': random_date(rng, year, 0),
+            'Publication Year': year,
+            'Start Page': start,
+            'End Page': end,
+            'Abstract': 'Lorem ipsum ' * 20,
+            'ISSN': rng.choice(['1234-5678', '']),
+            'ISBNs': rng.choice(['978-1-2345-6789-0', '']),
+            'DOI': f'10.1109/{i}',
+            'PDF Link': f'https://ieeexplore.ieee.org/stamp/stamp.jsp?arnumber={i}',
+            'Author Keywords': 'a;b;c',
+            'Article Citation Count': rng.randint(0, 100),
+            'Publisher': 'IEEE',
+            'Issue Date': random_date(rng, year, 0.6),
+            'Meeting Date': random_date(rng, year, 0.5),
+            'Online Date': random_date(rng, year),
+        })
+    pd.DataFrame(records).to_csv(file_url, index=False)
+
+
+def legacy_get_df(parser, file_url):
+    """
+    IeeeCsvParser.get_df of slr_helper 0.1.0.
+    """
+    ieee = pd.read_csv(file_url)
+    ieee = parser._rename_existing_(ieee)
+
+    for time_col in ['Issue Date', 'Meeting Date', 'Online Date', 'Date Added To Xplore']:
+        ieee[time_col] = ieee[time_col].apply(ieee_time_to_datetime)
+
+    def date_selector(x):
+        for col in ['Issue Date', 'Meeting Date', 'Online Date']:
+            if x[col]:
+                return x[col]
+        return x['Date Added To Xplore']
+
+    ieee['date'] = ieee.apply(date_selector, axis=1)
+    ieee['month'] = ieee.apply((lambda x: int(x['date'].month) if x['year'] == x['date'].year else 0), axis=1)
+    ieee['day'] = ieee.apply((lambda x: int(x['date'].day) if x['year'] == x['date'].year else 0), axis=1)
+
+    ieee['end_page'] = ieee['end_page'].apply(clean_page_nr)
+    ieee['start_page'] = ieee['start_page'].apply(clean_page_nr)
+    ieee['numpages'] = ieee.apply(get_numpages, axis=1)
+
+    ieee.isbn = ieee.isbn.fillna("Unknown")
+    ieee.issn = ieee.issn.fillna("Unknown")
+    ieee.isbn = ieee.isbn.apply(clean_isxn)
+    ieee.issn = ieee.issn.apply(clean_isxn)
+
+    return ieee[parser.target_columns]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    parser = IeeeCsvParser()
+    with tempfile.TemporaryDirectory() as directory:
+        file_url = os.path.join(directory, 'export.csv')
+        write_ieee_csv(file_url, args.rows)
+
+        old, old_time = timed(legacy_get_df, parser, file_url)
+        new, new_time = timed(parser.get_df, file_url)
+
+    pd.testing.assert_frame_equal(old, new)
+    print(f'rows: {args.rows}')
+    print(f'legacy:   {old_time:.3f} s')
+    print(f'columnar: {new_time:.3f} s ({old_time / new_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
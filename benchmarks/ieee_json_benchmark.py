@@ -0,0 +1,146 @@
+"""
+Compares the row-wise IeeeJsonParser.get_df_from_result of slr_helper 0.1.0 with the current columnar implementation
+on a synthetic Xplore API result and checks that both produce the same frame.
+
+Usage: python benchmarks/ieee_json_benchmark.py [--articles 20000]
+"""
+import argparse
+import copy
+import random
+import time
+import pandas as pd
+
+from functools import reduce
+
+from ieee_csv_benchmark import duplicate_of
+from slr_helper.parsers.ieee_json_parser import IeeeJsonParser, get_date
+from slr_helper.parsers.ieee_csv_parser import clean_isxn, clean_page_nr, get_numpages
+
+MONTHS = ['Jan.', 'Feb.', 'March', 'April', 'May', 'June', 'July', 'Aug.', 'Sept.', 'Oct.', 'Nov.', 'Dec.']
+FIRST_NAMES = ['John', 'Anna Maria', 'Li', 'Jose Luis', 'Kim']
+LAST_NAMES = ['Doe', 'Smith', 'Wang', 'Garcia', 'Lee', 'Meyer']
+
+
+def create_result(articles, seed=0, duplicate_rate=0.0):
+    rng = random.Random(seed)
+    result = []
+    for article_nr in range(articles):
+        i = duplicate_of(rng, article_nr, duplicate_rate)
+        year = rng.randint(1990, 2021)
+        authors = [{'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', 'author_order': order}
+                   for order in range(1, rng.randint(1, 8))]
+        rng.shuffle(authors)
+        day = rng.randint(1, 26)
+        article = {
+            'title': f'Paper {i}',
+            'authors': {'authors': authors},
+            'index_terms': {'ieee_terms': {'terms': ['Task analysis', 'Software']},
+                            'author_terms': {'terms': [f'term {i % 100}']}} if rng.random() > 0.1 else {},
+            'publication_year': str(year),
+            'publication_date': rng.choice([f'{day}-{day + 2} {rng.choice(MONTHS)} {year}',
+                                            f'{rng.choice(MONTHS)} {year + rng.choice([0, 1])}', '', 'Early Access']),
+            # journal articles have no conference dates, so some articles have no (parseable) date at all
+            'conference_dates': rng.choice([f'{day}-{day + 2} {rng.choice(MONTHS)} {year}', '']),
+            'html_url': f'https://ieeexplore.ieee.org/document/{i}/',
+            'doi': f'10.1109/{i}',
+            'publisher': 'IEEE',
+            'abstract': 'Lorem ipsum dolor sit amet. ' * 10,
+            'publication_title': f'Conference {i % 70}',
+            'citing_paper_count': rng.randint(0, 100),
+            'start_page': rng.choice([str(rng.randint(1, 900)), 'xii']),
+            'end_page': str(rng.randint(900, 999)),
+        }
+        if rng.random() > 0.3:
+            article['pdf_url'] = f'https://ieeexplore.ieee.org/stamp/stamp.jsp?arnumber={i}'
+        if rng.random() > 0.5:
+            article['isbn'] = '978-1-7281-0000-0'
+        if rng.random() > 0.5:
+            article['issn'] = '1234-5678'
+        result.append(article)
+    return {'total_records': articles, 'articles': result}
+
+
+def legacy_get_df_from_result(parser, search_result):
+    """
+    IeeeJsonParser.get_df_from_result of slr_helper 0.1.0.
+    """
+    def full_name_to_auth(name):
+        names = name.split()
+        for i, n in enumerate(names[:-1]):
+            names[i] = n[0] + '.'
+        return reduce(lambda a, b: a + ' ' + b, names)
+
+    def get_author_str_from_dict(authors):
+        l_auth = authors['authors']
+        if not l_auth:
+            return ''
+        names = []
+        for i in range(1, len(l_auth) + 1):
+            for author in l_auth:
+                if int(author['author_order']) == i:
+                    names.append(author['full_name'])
+                    break
+        names = [full_name_to_auth(x) for x in names]
+        return reduce(lambda a, b: a + ', ' + b, names)
+
+    articles = search_result['articles']
+    for article in articles:
+        article['authors'] = get_author_str_from_dict(article['authors'])
+    for article in articles:
+        index_terms = article['index_terms']
+        new_terms = []
+        for kind in index_terms.keys():
+            new_terms += index_terms[kind]['terms']
+        article['index_terms'] = reduce(lambda a, b: a + ';' + b, new_terms) if new_terms else ''
+
+    df = pd.DataFrame.from_dict(search_result['articles'])
+    for col in ['isbn', 'issn', 'start_page', 'end_page', 'pdf_url', 'html_url', 'publication_year',
+                'publication_title', 'index_terms']:
+        if col not in df.columns:
+            df[col] = None
+
+    df.isbn = df.isbn.fillna('Unknown')
+    df.issn = df.issn.fillna('Unknown')
+    df['isbn'] = df['isbn'].apply(clean_isxn)
+    df['issn'] = df['issn'].apply(clean_isxn)
+    df['start_page'] = df['start_page'].apply(clean_page_nr)
+    df['end_page'] = df['end_page'].apply(clean_page_nr)
+    df['numpages'] = df.apply(get_numpages, axis=1)
+    df['url'] = df.apply(lambda x: x['pdf_url'] if x['pdf_url'] else x['html_url'], axis=1)
+    df['date'] = df.apply(get_date, axis=1)
+    df['year'] = df.apply(lambda x: int(x['publication_year']) if x['publication_year'] else x['date'].year, axis=1)
+    df['month'] = df.apply((lambda x: int(x['date'].month) if x['year'] == x['date'].year else 0), axis=1)
+    df['day'] = df.apply((lambda x: int(x['date'].day) if x['year'] == x['date'].year else 0), axis=1)
+    df = df.rename(
+        columns={'index_terms': 'keywords', 'publication_title': 'published_in', 'citing_paper_count': 'refcount'})
+    return df[parser.target_columns]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--articles', type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    parser = IeeeJsonParser()
+    result = create_result(args.articles)
+    legacy_result = copy.deepcopy(result)  # the legacy implementation modifies its input
+
+    old, old_time = timed(legacy_get_df_from_result, parser, legacy_result)
+    new, new_time = timed(parser.get_df_from_result, result)
+
+    # 0.1.0 returned NaN as url of articles without pdf_url (NaN is truthy), now their html_url is used.
+    old['url'] = old['url'].fillna(new['url'])
+    pd.testing.assert_frame_equal(old, new)
+    print(f'articles: {args.articles}')
+    print(f'legacy:   {old_time:.3f} s')
+    print(f'columnar: {new_time:.3f} s ({old_time / new_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
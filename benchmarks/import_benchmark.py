@@ -0,0 +1,56 @@
+"""
+Measures the import time of slr_helper in fresh interpreters and checks that heavy dependencies are only loaded when
+they are needed. 'from slr_helper import *' loads all public names, i.e. what 'import slr_helper' cost before the
+names were imported lazily.
+
+Usage: python benchmarks/import_benchmark.py [--repeat 5]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'numpy', 'pybtex', 'dateutil', 'pyarrow', 'ieee_xplore']
+
+# statement -> heavy modules, which must not be loaded by it (recent pandas versions import pyarrow themselves)
+CASES = {'import slr_helper': HEAVY_MODULES,
+         'import slr_helper.search': HEAVY_MODULES,
+         'from slr_helper import IeeeCsvParser': ['pybtex', 'ieee_xplore'],
+         'from slr_helper.search import IeeeSearch': ['pybtex', 'ieee_xplore'],
+         'from slr_helper import *': ['ieee_xplore']
+         }
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {modules!r} if m in sys.modules]}}))
+'''
+
+
+def measure(statement):
+    output = subprocess.run([sys.executable, '-c', SCRIPT.format(statement=statement, modules=HEAVY_MODULES)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    failed = False
+    for statement, forbidden in CASES.items():
+        results = [measure(statement) for _ in range(args.repeat)]
+        loaded = results[0]['loaded']
+        unexpected = [m for m in loaded if m in forbidden]
+        failed |= bool(unexpected)
+        print(f'{statement:<45}{min(r["seconds"] for r in results) * 1000:8.1f} ms  loaded: {", ".join(loaded) or "-"}'
+              + (f'  UNEXPECTED: {", ".join(unexpected)}' if unexpected else ''))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
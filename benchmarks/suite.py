@@ -0,0 +1,159 @@
+"""
+Benchmark suite of the parsers, the deduplication and the core coverage on synthetic exports of configurable sizes and
+duplicate rates. Every benchmark is timed (best of --repeat runs) and, in a separate run, its peak memory is measured
+with tracemalloc (main process only, BibTexParser normalizes the entries in worker processes). The results are
+written as JSON, which --compare reads to report the changes to a previous run.
+
+Usage: python benchmarks/suite.py [--sizes 1000 10000 100000] [--duplicate-rate 0.1] [--repeat 3]
+                                  [--only Util.merge_frames ...] [--output results.json] [--compare previous.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+from bibtex_benchmark import write_bibtex
+from ieee_csv_benchmark import write_ieee_csv
+from ieee_json_benchmark import create_result
+
+from slr_helper import BibTexParser, IeeeCsvParser, FrameQuality, Util
+from slr_helper.parsers import IeeeJsonParser
+
+CORE_SIZE = 100
+SOURCES = 3
+
+
+def bench_ieee_csv(directory, rows, duplicate_rate):
+    file_url = os.path.join(directory, 'export.csv')
+    write_ieee_csv(file_url, rows, duplicate_rate=duplicate_rate)
+    parser = IeeeCsvParser()
+    return lambda: parser.get_df(file_url)
+
+
+def bench_ieee_json(directory, rows, duplicate_rate):
+    result = create_result(rows, duplicate_rate=duplicate_rate)
+    parser = IeeeJsonParser()
+    return lambda: parser.get_df_from_result(result, warn_incomplete=False)
+
+
+def bench_bibtex(directory, rows, duplicate_rate):
+    file_url = os.path.join(directory, 'export.bib')
+    write_bibtex(file_url, rows, duplicate_rate=duplicate_rate)
+    parser = BibTexParser(get_refcount=False)
+    return lambda: parser.get_df(file_url)
+
+
+def get_source_frames(directory, rows, duplicate_rate):
+    """
+    :return: SOURCES parsed IEEE CSV exports of together rows rows, which overlap by duplicate_rate.
+    """
+    frames = []
+    for seed in range(SOURCES):
+        file_url = os.path.join(directory, f'source-{seed}.csv')
+        write_ieee_csv(file_url, rows // SOURCES, seed=seed, duplicate_rate=duplicate_rate)
+        frames.append(IeeeCsvParser().get_df(file_url))
+    return frames
+
+
+def bench_merge_frames(directory, rows, duplicate_rate):
+    frames = get_source_frames(directory, rows, duplicate_rate)
+    return lambda: Util.merge_frames(frames)
+
+
+def bench_core_coverage(directory, rows, duplicate_rate):
+    frame = Util.concatenate_frames(get_source_frames(directory, rows, duplicate_rate))
+    core = frame.sample(min(CORE_SIZE, len(frame)), random_state=0)
+    quality = FrameQuality(core)
+    return lambda: quality.get_core_coverage(frame)
+
+
+BENCHMARKS = {'IeeeCsvParser.get_df': bench_ieee_csv,
+              'IeeeJsonParser.get_df_from_result': bench_ieee_json,
+              'BibTexParser.get_df': bench_bibtex,
+              'Util.merge_frames': bench_merge_frames,
+              'FrameQuality.get_core_coverage': bench_core_coverage
+              }
+
+
+def measure(func, repeat):
+    """
+    :return: (best time in seconds, peak traced memory in bytes)
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def get_environment():
+    try:
+        from importlib.metadata import version
+        slr_helper_version = version('slr_helper')
+    except Exception:
+        slr_helper_version = None
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'slr_helper': slr_helper_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+            }
+
+
+def compare(results, previous):
+    before = {(r['benchmark'], r['rows'], r['duplicate_rate']): r for r in previous['results']}
+    print(f'\ncompared to {previous["environment"]["date"]}:')
+    for result in results:
+        old = before.get((result['benchmark'], result['rows'], result['duplicate_rate']))
+        if old is None:
+            continue
+        print(f'{result["benchmark"]:<36}{result["rows"]:>9}  time {result["seconds"] / old["seconds"]:6.2f}x  '
+              f'memory {result["peak_bytes"] / max(old["peak_bytes"], 1):6.2f}x')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    arg_parser.add_argument('--duplicate-rate', type=float, default=0.1)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='run only these benchmarks')
+    arg_parser.add_argument('--output', help='write the results as JSON to this file')
+    arg_parser.add_argument('--compare', help='JSON results of a previous run')
+    args = arg_parser.parse_args()
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        for rows in args.sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                func = BENCHMARKS[name](directory, rows, args.duplicate_rate)
+                seconds, peak = measure(func, args.repeat)
+            results.append({'benchmark': name, 'rows': rows, 'duplicate_rate': args.duplicate_rate,
+                            'seconds': seconds, 'peak_bytes': peak})
+            print(f'{name:<36}{rows:>9}  {seconds:9.3f} s  {peak / 2 ** 20:9.1f} MiB peak', flush=True)
+
+    output = {'environment': get_environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
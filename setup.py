@@ -13,5 +13,7 @@ setup(
     version="0.1.0",
     package_dir={'': 'src'},
     packages=find_packages(where='src'),
-    install_requires=requirements
+    install_requires=requirements,
+    extras_require={'parquet': ['pyarrow>=1.0.0'],
+                    'ranking': ['scipy>=1.5.0']}
 )
@@ -1,6 +1,42 @@
-from .parsers.bibtex_parser import BibTexParser
-from .parsers.ieee_csv_parser import IeeeCsvParser
-from .parsers.slr_helper_csv_parser import SlrHelperCsvParser
+# The public names are imported on first access (PEP 562), so that `import slr_helper` does not load pandas, numpy,
+# pybtex or dateutil before they are needed.
+import importlib
 
-from .utils import Util
-from .quality import FrameQuality
+from typing import TYPE_CHECKING
+
+_LAZY_NAMES = {'BibTexParser': '.parsers.bibtex_parser',
+               'IeeeCsvParser': '.parsers.ieee_csv_parser',
+               'SlrHelperCsvParser': '.parsers.slr_helper_csv_parser',
+               'SlrHelperParquetParser': '.parsers.slr_helper_parquet_parser',
+               'Util': '.utils',
+               'FrameQuality': '.quality'
+               }
+
+__all__ = list(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .parsers.bibtex_parser import BibTexParser
+    from .parsers.ieee_csv_parser import IeeeCsvParser
+    from .parsers.slr_helper_csv_parser import SlrHelperCsvParser
+    from .parsers.slr_helper_parquet_parser import SlrHelperParquetParser
+
+    from .utils import Util
+    from .quality import FrameQuality
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        # submodules, which were loaded by the former eager imports (e.g. slr_helper.utils)
+        try:
+            return importlib.import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,154 @@
+import os
+import copy
+import glob
+import json
+import hashlib
+import pandas as pd
+
+from slr_helper.parsers import Parser
+from slr_helper.utils import get_cache_dir
+
+# Bump whenever the output of a parser changes, so that frames cached by an older version are not used anymore.
+CACHE_VERSION = 2
+CACHE_SUFFIX = '.pkl'
+# parser options which only affect the speed of parsing, not the frame
+PERFORMANCE_OPTIONS = {'workers', 'entries_per_worker', 'refcount_workers', 'refcount_rate'}
+
+
+def get_file_hash(file_url, block_size=1 << 20) -> str:
+    """
+    :return: hex sha256 of the content of the file.
+    """
+    sha = hashlib.sha256()
+    with open(file_url, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def get_parser_hash(parser: Parser) -> str:
+    """
+    :return: hex sha256 of the parser class, CACHE_VERSION and the parser's options (its simple attributes, except
+             PERFORMANCE_OPTIONS).
+    """
+    options = {key: value for key, value in vars(parser).items()
+               if isinstance(value, (str, int, float, bool, type(None), list, tuple, dict))
+               and key not in PERFORMANCE_OPTIONS}
+    description = json.dumps([type(parser).__module__, type(parser).__qualname__, CACHE_VERSION, options],
+                             sort_keys=True, default=str)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class FrameCache:
+    """
+    On-disk cache of parsed frames, keyed by the content hash of the parsed file and the parser (class, version and
+    options). Frames are stored as pickles, which keep all dtypes and load in milliseconds. If the cache grows beyond
+    max_bytes, the least recently used frames are evicted.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 << 30):
+        """
+        :param directory: directory of the cache. Default: frames in utils.get_cache_dir()
+        :param max_bytes: maximal total size of the cached frames.
+        """
+        self.directory = directory if directory else os.path.join(get_cache_dir(), 'frames')
+        self.max_bytes = max_bytes
+
+    def _path_(self, file_hash, parser_hash):
+        return os.path.join(self.directory, f'{file_hash[:32]}-{parser_hash[:16]}{CACHE_SUFFIX}')
+
+    def _entries_(self, file_hash='*', parser_hash='*'):
+        pattern = f'{file_hash[:32]}-{parser_hash[:16]}{CACHE_SUFFIX}'
+        return glob.glob(os.path.join(self.directory, pattern))
+
+    def get(self, parser: Parser, file_url):
+        """
+        :return: the cached frame of file_url parsed by parser or None.
+        """
+        path = self._path_(get_file_hash(file_url), get_parser_hash(parser))
+        try:
+            df = pd.read_pickle(path)
+        except (OSError, EOFError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return df
+
+    def put(self, parser: Parser, file_url, df: pd.DataFrame):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path_(get_file_hash(file_url), get_parser_hash(parser))
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self._evict_()
+
+    def get_df(self, parser: Parser, file_url) -> pd.DataFrame:
+        """
+        Returns the cached frame or parses file_url with parser and caches the result.
+
+        Refcounts change over time, so frames of a BibTexParser with get_refcount are cached without them and enriched
+        on every load (from its RefcountCache, which expires refcounts after refcount_cache_ttl).
+        """
+        enrich = getattr(parser, 'get_refcount', False) and hasattr(parser, 'add_refcounts')
+        cached_parser = parser
+        if enrich:
+            cached_parser = copy.copy(parser)
+            cached_parser.get_refcount = False
+        df = self.get(cached_parser, file_url)
+        if df is None:
+            df = cached_parser.get_df(file_url)
+            self.put(cached_parser, file_url, df)
+        return parser.add_refcounts(df) if enrich else df
+
+    def invalidate(self, file_url=None, parser: Parser = None) -> int:
+        """
+        Removes the cached frames of the current content of file_url and/or of parser. Without arguments the whole
+        cache is cleared.
+
+        :return: number of removed frames.
+        """
+        file_hash = get_file_hash(file_url) if file_url is not None else '*'
+        parser_hash = get_parser_hash(parser) if parser is not None else '*'
+        paths = self._entries_(file_hash, parser_hash)
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+    def clear(self) -> int:
+        return self.invalidate()
+
+    def size(self) -> int:
+        """
+        :return: total size of the cached frames in bytes.
+        """
+        return sum(os.path.getsize(path) for path in self._entries_())
+
+    def _evict_(self):
+        entries = [(os.stat(path), path) for path in self._entries_()]
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= stat.st_size
+
+
+class CachedParser(Parser):
+    """
+    Wraps a parser, such that get_df returns the frame from a FrameCache if the file has been parsed before.
+
+    Example: CachedParser(IeeeCsvParser()).get_df('export.csv')
+    """
+
+    def __init__(self, parser: Parser, cache: FrameCache = None):
+        super().__init__()
+        self.parser = parser
+        self.cache = cache if cache is not None else FrameCache()
+
+    def get_df(self, file_url: str):
+        return self.cache.get_df(self.parser, file_url)
+
+    def invalidate(self, file_url=None) -> int:
+        """
+        Removes the cached frames of this parser (only for the current content of file_url, if given).
+        """
+        return self.cache.invalidate(file_url=file_url, parser=self.parser)
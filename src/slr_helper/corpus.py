@@ -0,0 +1,125 @@
+import os
+import json
+import pickle
+import numpy as np
+import pandas as pd
+
+from slr_helper.dedup import KeyHashSet, hash_keys
+from slr_helper.utils import row_equals, get_matcher
+
+CORPUS_VERSION = 1
+META_FILE = 'corpus.json'
+KEYS_FILE = 'keys.pkl'
+PARTS_DIR = 'parts'
+
+
+class Corpus:
+    """
+    Persistent, duplicate free collection of papers in a directory, which grows by appending.
+
+    The corpus consists of append-only part files with the unique rows of every added frame and an append-only index
+    of the (hashed) dedup keys of all rows. Adding a frame only checks its own rows against the index, so its cost
+    depends on the size of the frame, not on the size of the corpus. Every row records its source in the column
+    'source'.
+
+    Example:
+        corpus = Corpus('./corpus')
+        corpus.add(IeeeCsvParser().get_df('export.csv'), source='export.csv')
+        df = corpus.to_frame()
+    """
+
+    def __init__(self, directory, equal_func=row_equals):
+        """
+        :param directory: directory of the corpus, created if it does not exist.
+        :param equal_func: a key based strategy such as the default Util.row_equals or dedup.KeyMatcher. Reopen a
+                           corpus always with the same strategy.
+        """
+        self.directory = directory
+        self.matcher = get_matcher(equal_func)
+        if not hasattr(self.matcher, 'keys'):
+            raise ValueError('A corpus requires a key based equal_func, e.g. dedup.KeyMatcher')
+
+        os.makedirs(os.path.join(directory, PARTS_DIR), exist_ok=True)
+        self._meta = {'version': CORPUS_VERSION, 'parts': [], 'rows': 0, 'keys_bytes': 0}
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as file:
+                self._meta = json.load(file)
+        self._keys = KeyHashSet(self._load_keys_())
+
+    def _load_keys_(self):
+        hashes = []
+        path = os.path.join(self.directory, KEYS_FILE)
+        if not self._meta['keys_bytes']:
+            return hashes
+        with open(path, 'rb') as file:
+            while file.tell() < self._meta['keys_bytes']:
+                hashes.extend(pickle.load(file).tolist())
+        return hashes
+
+    def _save_meta_(self):
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self._meta, file)
+        os.replace(path + '.tmp', path)
+
+    def __len__(self):
+        return self._meta['rows']
+
+    def add(self, frame: pd.DataFrame, source: str) -> pd.DataFrame:
+        """
+        Appends the rows of frame which are not yet contained in the corpus (nor duplicated within frame).
+
+        :param source: provenance of the rows, e.g. the exported file or the search query.
+        :return: the appended rows.
+        """
+        keep, hashes = self._keys.filter_new(self.matcher.keys(frame))
+        new_rows = frame[keep].copy()
+        if not len(new_rows):
+            return new_rows
+        new_rows['source'] = source
+
+        # write the rows before the index and the metadata, which makes them visible, so that a crash never leaves
+        # indexed keys without rows
+        name = f'part-{len(self._meta["parts"]):06d}.pkl'
+        new_rows.reset_index(drop=True).to_pickle(os.path.join(self.directory, PARTS_DIR, name))
+
+        with open(os.path.join(self.directory, KEYS_FILE), 'ab') as file:
+            file.truncate(self._meta['keys_bytes'])  # drop keys of an interrupted add
+            file.seek(self._meta['keys_bytes'])
+            pickle.dump(np.asarray(hashes), file)
+            keys_bytes = file.tell()
+
+        self._meta['parts'].append(name)
+        self._meta['rows'] += len(new_rows)
+        self._meta['keys_bytes'] = keys_bytes
+        self._save_meta_()
+        self._keys.update(hashes)
+        return new_rows
+
+    def contains(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        :return: boolean array, which is True for every row of frame whose key is already in the corpus.
+        """
+        keys = self.matcher.keys(frame)
+        has_key = keys.notna().to_numpy()
+        contained = np.zeros(len(frame), dtype=bool)
+        contained[has_key] = [h in self._keys.hashes for h in hash_keys(keys[has_key]).tolist()]
+        return contained
+
+    def iter_parts(self, columns=None):
+        """
+        Yields the frames of all parts in the order they were added.
+        """
+        for name in self._meta['parts']:
+            df = pd.read_pickle(os.path.join(self.directory, PARTS_DIR, name))
+            yield df[columns] if columns is not None else df
+
+    def to_frame(self, columns=None) -> pd.DataFrame:
+        """
+        :return: the whole corpus as a single frame (with a new index).
+        """
+        parts = list(self.iter_parts(columns))
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,123 @@
+import re
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+import dateutil.parser as dateparser
+
+from collections import OrderedDict
+
+from slr_helper import instrumentation
+
+DEFAULT_MAXSIZE = 65536
+
+# Complete dates with an unambiguous format, for which datetime.strptime gives the same result as dateutil. Dates
+# without day (e.g. 'March 2020') are left to dateutil, which fills missing fields from the current date.
+DEFAULT_FORMATS = [(r'\d{1,2} [A-Za-z]{3} \d{4}', '%d %b %Y'),
+                   (r'\d{1,2} [A-Za-z]{3}\. \d{4}', '%d %b. %Y'),
+                   (r'\d{1,2} [A-Za-z]{4,9} \d{4}', '%d %B %Y'),
+                   (r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d')
+                   ]
+
+
+class DateParser:
+    """
+    Parses date strings with a bounded LRU cache of the results, which is shared by all files parsed with the same
+    instance. Exports usually contain only a few hundred distinct date strings, so parse_column parses every distinct
+    string of a column only once (and not at all if it was parsed before).
+
+    A string is first tried with the fixed formats and, if none matches, with dateutil. Strings which cannot be parsed
+    and values which are not strings (e.g. NaN) are returned as None.
+    """
+
+    def __init__(self, formats=DEFAULT_FORMATS, use_dateutil=True, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param formats: list of (regex, strptime format), the format is tried if the stripped string fully matches the
+                        regex. A regex of None tries the format for every string.
+        :param use_dateutil: parse strings not matching any format with dateutil.parser.parse
+        :param maxsize: maximum number of cached strings.
+        """
+        self.formats = [(re.compile(pattern) if pattern else None, fmt) for pattern, fmt in formats]
+        self.use_dateutil = use_dateutil
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _parse_(self, x):
+        stripped = x.strip()
+        for pattern, fmt in self.formats:
+            if pattern is None or pattern.fullmatch(stripped):
+                try:
+                    return datetime.datetime.strptime(stripped if pattern else x, fmt)
+                except ValueError:
+                    pass
+        if self.use_dateutil:
+            try:
+                return dateparser.parse(x)
+            except dateparser.ParserError:
+                pass
+        return None
+
+    def parse(self, x):
+        """
+        :return: the datetime of x or None.
+        """
+        if not x or type(x) != str:
+            return None
+        with self._lock:
+            if x in self._cache:
+                self._cache.move_to_end(x)
+                self.hits += 1
+                return self._cache[x]
+        value = self._parse_(x)
+        with self._lock:
+            self.misses += 1
+            self._cache[x] = value
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def parse_column(self, column: pd.Series) -> tuple:
+        """
+        :return: 2-tuple (codes, parsed) of an int array, which maps every row of column to its position in parsed,
+                 and an object Series of the parsed distinct values (datetime or None). Gather the result with
+                 parsed.to_numpy()[codes].
+        """
+        codes, uniques = pd.factorize(column)
+        instrumentation.count('dates.rows', len(column))
+        with instrumentation.span('dates.parse'):
+            values = [self.parse(x) for x in uniques]
+        # missing values have the code -1 (use_na_sentinel=False requires pandas 1.5), map them to a trailing None
+        missing = codes < 0
+        if missing.any():
+            codes = np.where(missing, len(values), codes)
+            values.append(None)
+        # object dtype: pandas would otherwise infer datetime64 and replace None by NaT
+        parsed = pd.Series(values, dtype=object)
+        return codes, parsed
+
+    def to_series(self, column: pd.Series) -> pd.Series:
+        """
+        :return: the parsed dates of column with its index; datetime64 if pandas infers it, else datetime/None.
+        """
+        codes, parsed = self.parse_column(column)
+        return pd.Series(parsed.to_numpy()[codes], index=column.index)
+
+    def cache_info(self) -> dict:
+        """
+        :return: {'hits': int, 'misses': int, 'size': int, 'maxsize': int}
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# shared by BibTexParser and IeeeJsonParser
+DEFAULT_DATE_PARSER = DateParser()
@@ -0,0 +1,326 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+from itertools import combinations
+
+
+def title_key(frame: pd.DataFrame) -> pd.Series:
+    """
+    Default key function: the lower-cased title of every row. Two rows have the same key exactly when
+    utils.row_equals considers them equal. Rows without a title string have no key (NaN).
+    """
+    # astype(object): a column without any title is float NaN, which has no .str accessor
+    return frame['title'].astype(object).where(frame['title'].map(type) == str).str.lower()
+
+
+class KeyIndex:
+    """
+    Maps dedup keys to the (ascending) positions of the rows they were computed from. Rows without a key (NaN) are
+    never indexed and therefore never reported as duplicates.
+    """
+
+    def __init__(self, keys: pd.Series):
+        self.positions = {}
+        for pos, key in enumerate(keys):
+            if not pd.isna(key):
+                self.positions.setdefault(key, []).append(pos)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def get(self, key) -> list:
+        return self.positions.get(key, [])
+
+
+def hash_keys(keys: pd.Series) -> np.ndarray:
+    """
+    :return: 64-bit hashes (uint64) of the keys.
+    """
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class KeyHashSet:
+    """
+    Set of 64-bit hashes of dedup keys. Allows deduplicating a stream of frames by keeping only 8 bytes per unique row
+    instead of the rows or their keys.
+    """
+
+    def __init__(self, hashes=()):
+        self.hashes = set(hashes)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def filter_new(self, keys: pd.Series):
+        """
+        Does not modify the set.
+
+        :return: 2-tuple (keep, hashes) of a boolean array, which is True for the first occurrence of every key not
+                 contained in the set and for every row without key (NaN), and the hashes of the kept keys.
+        """
+        has_key = keys.notna().to_numpy()
+        hashes = hash_keys(keys[has_key])
+        unseen = np.fromiter((h not in self.hashes for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        unique = ~pd.Series(hashes).duplicated().to_numpy() & unseen
+
+        keep = ~has_key
+        keep[has_key] = unique
+        return keep, hashes[unique]
+
+    def update(self, hashes):
+        self.hashes.update(np.asarray(hashes).tolist())
+
+
+class KeyMatcher:
+    """
+    Duplicate detection strategy for Util.find_duplicate_indices & co. which considers two rows equal if their keys
+    (as computed by key_func) are equal. Instead of comparing every pair of rows, the keys of a frame are computed once
+    and hashed into a KeyIndex, so finding duplicates takes roughly linear time.
+
+    A KeyMatcher can also be called like an ordinary equal_func(row, row) -> bool.
+    """
+
+    def __init__(self, key_func=title_key):
+        """
+        :param key_func: function (pd.DataFrame -> pd.Series) returning one hashable key per row. Default: title_key
+        """
+        self.key_func = key_func
+
+    def __call__(self, a, b):
+        keys = self.key_func(pd.DataFrame([a, b]))
+        return keys.iloc[0] == keys.iloc[1]
+
+    def keys(self, frame: pd.DataFrame) -> pd.Series:
+        return self.key_func(frame)
+
+    def build_index(self, frame: pd.DataFrame) -> KeyIndex:
+        return KeyIndex(self.keys(frame))
+
+    def find_duplicate_indices(self, frame: pd.DataFrame) -> list:
+        """
+        Same result as the pairwise search in Util.find_duplicate_indices: for every row i (in order) the positions
+        j > i of all rows with the same key. Hence, a row occurring k times is reported k - 1 times.
+        """
+        keys = self.keys(frame)
+        index = KeyIndex(keys)
+        seen = {}
+        duplicates = []
+        for key in keys:
+            if pd.isna(key):
+                continue
+            group = index.get(key)
+            rank = seen.get(key, 0)
+            seen[key] = rank + 1
+            duplicates.extend(group[rank + 1:])
+        return duplicates
+
+    def find_duplicate_indices_two_frames(self, frame1: pd.DataFrame, frame2: pd.DataFrame,
+                                          short_circuit=False) -> list:
+        """
+        Same result as the pairwise search in Util.find_duplicate_indices_two_frames, but frame2 is indexed only once.
+        """
+        index = self.build_index(frame2)
+        duplicates = []
+        for i, key in enumerate(self.keys(frame1)):
+            if pd.isna(key):
+                continue
+            matches = index.get(key)
+            if short_circuit:
+                matches = matches[:1]
+            duplicates.extend((i, j) for j in matches)
+        return duplicates
+
+
+DEFAULT_MATCHER = KeyMatcher(title_key)
+
+
+LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+')
+NON_WORD = re.compile(r'[\W_]+')
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_title(title) -> str:
+    """
+    Lower-cases the title and strips LaTeX commands, braces, punctuation and repeated whitespace, such that the same
+    title exported by different databases (or BibTexParser) yields the same string.
+    """
+    if not isinstance(title, str):
+        return ''
+    title = LATEX_COMMAND.sub('', title).replace('{', '').replace('}', '').lower()
+    return NON_WORD.sub(' ', title).strip()
+
+
+def get_shingles(text: str, ngram: int) -> set:
+    if len(text) <= ngram:
+        return {text} if text else set()
+    return {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+
+
+def first_author_key(authors) -> str:
+    """
+    Last name of the first author, lower-cased. Works for the '; ' (bibtex, csv) and ', ' (json) separated author
+    strings produced by the parsers.
+    """
+    if not isinstance(authors, str):
+        return ''
+    first = re.split('[;,]', authors, maxsplit=1)[0].split()
+    return first[-1].lower() if first else ''
+
+
+class NearDuplicateMatcher:
+    """
+    Duplicate detection strategy for Util.find_duplicate_indices & co. which finds near-duplicates, i.e. rows whose
+    normalized titles are similar but not necessarily equal (different punctuation, LaTeX braces, truncated titles).
+
+    Rows are grouped into blocks and only pairs within a block are scored:
+    - MinHash LSH buckets over the character n-grams of the normalized title,
+    - equal DOI (such pairs are always scored 1.0),
+    - equal year and last name of the first author.
+    A candidate pair is a match if its score reaches the threshold.
+    """
+
+    def __init__(self, threshold=0.8, measure='jaccard', ngram=3, bands=16, rows_per_band=4, max_block_size=1000,
+                 use_doi=True, use_year_author=True, seed=42):
+        """
+        :param threshold: minimal score (0..1) for two rows to be considered duplicates.
+        :param measure: 'jaccard' (|A & B| / |A | B|) or 'containment' (|A & B| / min(|A|, |B|)) of the title n-grams.
+                        'containment' also matches a truncated title with its full version.
+        :param ngram: length of the character n-grams (shingles) of the normalized title.
+        :param bands: number of LSH bands. More bands find more candidates with lower similarity.
+        :param rows_per_band: number of MinHash values per band. More rows make buckets more selective.
+        :param max_block_size: blocks with more rows are skipped, since they would produce too many candidates.
+        :param use_doi: additionally block by DOI.
+        :param use_year_author: additionally block by year and first author.
+        :param seed: seed of the MinHash permutations.
+        """
+        if measure not in ('jaccard', 'containment'):
+            raise ValueError(f'Unknown similarity measure {measure}')
+        self.threshold = threshold
+        self.measure = measure
+        self.ngram = ngram
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        self.max_block_size = max_block_size
+        self.use_doi = use_doi
+        self.use_year_author = use_year_author
+
+        random = np.random.RandomState(seed)
+        num_perm = bands * rows_per_band
+        self._perm_a = random.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._perm_b = random.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def __call__(self, a, b):
+        return self.score(normalize_title(a['title']), normalize_title(b['title'])) >= self.threshold
+
+    def score(self, title1: str, title2: str) -> float:
+        """
+        Similarity of two normalized titles.
+        """
+        return self._score_shingles_(get_shingles(title1, self.ngram), get_shingles(title2, self.ngram))
+
+    def _score_shingles_(self, a: set, b: set) -> float:
+        if not a or not b:
+            return 0.
+        common = len(a & b)
+        if self.measure == 'containment':
+            return common / min(len(a), len(b))
+        return common / (len(a) + len(b) - common)
+
+    def _minhash_(self, shingles: set) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(x.encode()) for x in shingles), dtype=np.uint64, count=len(shingles))
+        hashes %= MERSENNE_PRIME
+        values = (self._perm_a[:, None] * hashes[None, :] + self._perm_b[:, None]) % MERSENNE_PRIME
+        return values.min(axis=1)
+
+    def _blocks_(self, frame: pd.DataFrame, shingles: list):
+        """
+        Yields (block, always_match) for every block of row positions.
+        """
+        buckets = {}
+        for pos, row_shingles in enumerate(shingles):
+            if not row_shingles:
+                continue
+            signature = self._minhash_(row_shingles)
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+                buckets.setdefault(key, []).append(pos)
+        for block in buckets.values():
+            yield block, False
+
+        if self.use_doi and 'doi' in frame.columns:
+            # astype(object): a column without any DOI is float NaN, which has no .str accessor
+            dois = frame['doi'].astype(object).where(frame['doi'].map(type) == str).str.lower()
+            for block in self._group_positions_(dois):
+                yield block, True
+
+        if self.use_year_author and 'year' in frame.columns and 'authors' in frame.columns:
+            authors = frame['authors'].map(first_author_key).replace('', np.nan)
+            keys = frame['year'].astype(str).where(authors.notna()) + ' ' + authors
+            for block in self._group_positions_(keys):
+                yield block, False
+
+    @staticmethod
+    def _group_positions_(keys: pd.Series):
+        positions = {}
+        for pos, key in enumerate(keys):
+            if not pd.isna(key) and key != '':
+                positions.setdefault(key, []).append(pos)
+        return positions.values()
+
+    def _match_pairs_(self, frame: pd.DataFrame, pair_filter=None) -> dict:
+        titles = frame['title'].map(normalize_title).tolist()
+        shingles = [get_shingles(title, self.ngram) for title in titles]
+        scores = {}
+        for block, always_match in self._blocks_(frame, shingles):
+            if len(block) < 2 or len(block) > self.max_block_size:
+                continue
+            for pair in combinations(block, 2):
+                if pair_filter is not None and not pair_filter(pair):
+                    continue
+                if always_match:
+                    scores[pair] = 1.
+                elif pair not in scores:
+                    scores[pair] = self._score_shingles_(shingles[pair[0]], shingles[pair[1]])
+        return {pair: score for pair, score in scores.items() if score >= self.threshold}
+
+    def find_matches(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Finds all near-duplicate pairs in the frame.
+
+        :return: DataFrame with the columns 'index', 'duplicate' (positions in frame, index < duplicate) and 'score',
+                 sorted by index and duplicate.
+        """
+        pairs = self._match_pairs_(frame)
+        matches = pd.DataFrame([(i, j, score) for (i, j), score in sorted(pairs.items())],
+                               columns=['index', 'duplicate', 'score'])
+        return matches.astype({'index': int, 'duplicate': int, 'score': float})
+
+    def find_duplicate_indices(self, frame: pd.DataFrame) -> list:
+        """
+        For every matching pair (i, j), i < j, in order the position j. Same format as Util.find_duplicate_indices.
+        """
+        return [j for (_, j) in sorted(self._match_pairs_(frame))]
+
+    def find_duplicate_indices_two_frames(self, frame1: pd.DataFrame, frame2: pd.DataFrame,
+                                          short_circuit=False) -> list:
+        """
+        Same format as Util.find_duplicate_indices_two_frames. With short_circuit, the best scoring match is reported.
+        """
+        offset = len(frame1)
+        columns = [c for c in ('title', 'doi', 'year', 'authors') if c in frame1.columns and c in frame2.columns]
+        frame = pd.concat([frame1[columns], frame2[columns]], ignore_index=True)
+        pairs = self._match_pairs_(frame, pair_filter=lambda pair: pair[0] < offset <= pair[1])
+
+        duplicates = sorted(((i, j - offset), score) for (i, j), score in pairs.items())
+        if short_circuit:
+            best = {}
+            for (i, j), score in duplicates:
+                if i not in best or score > best[i][1]:
+                    best[i] = (j, score)
+            return [(i, j) for i, (j, _) in sorted(best.items())]
+        return [pair for pair, _ in duplicates]
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from slr_helper.index import InvertedIndex, parse_query
+from slr_helper.quality import FrameQuality
+
+DEFAULT_MAX_CACHE_BYTES = 512 << 20
+
+
+class ResultCache:
+    """
+    Memo for the results of sub queries (see InvertedIndex.evaluate), which drops the least recently used results once
+    they take more than max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def __contains__(self, node):
+        if node in self._results:
+            self._results.move_to_end(node)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, node):
+        return self._results[node]
+
+    def __setitem__(self, node, rows):
+        if node in self._results:
+            self.bytes -= self._results.pop(node).nbytes
+        self._results[node] = rows
+        self.bytes += rows.nbytes
+        while self.bytes > self.max_bytes and len(self._results) > 1:
+            _, dropped = self._results.popitem(last=False)
+            self.bytes -= dropped.nbytes
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        self._results.clear()
+        self.bytes = 0
+
+
+class QueryEvaluator:
+    """
+    Evaluates candidate search strings offline against an already harvested corpus instead of the IEEE Xplore API,
+    e.g. to prune the query space before calling IeeeSearch.search for the most promising ones.
+
+    The queries are answered by an InvertedIndex over the corpus; sub queries shared by the candidates (such as a
+    common "systematic review" part) are evaluated once. The results are only as complete as the corpus: core papers
+    which are not contained in it can never be found (see reachable), and the sizes are the number of corpus rows
+    matching a query, not the number of records Xplore would return.
+
+    Example:
+        evaluator = QueryEvaluator(corpus.to_frame(), FrameQuality(core_df))
+        stats = evaluator.evaluate(['"Abstract":"systematic review" AND softw*', ...])
+        stats.sort_values('coverage', ascending=False)
+    """
+
+    def __init__(self, corpus_df: pd.DataFrame, quality: FrameQuality, index: InvertedIndex = None,
+                 max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+        """
+        :param corpus_df: the harvested papers, e.g. Corpus.to_frame() or the merged results of earlier searches.
+        :param quality: the core papers and the equality strategy. Its hit stats are updated by every evaluation as if
+                        FrameQuality.get_core_coverage was called with the result of each query.
+        :param index: an InvertedIndex of exactly the rows of corpus_df, built if not given.
+        :param max_cache_bytes: memory for memoized sub query results.
+        """
+        if index is None:
+            index = InvertedIndex()
+            index.add(corpus_df)
+        elif len(index) != len(corpus_df):
+            raise ValueError(f'The index contains {len(index)} rows, but the corpus {len(corpus_df)}')
+        self.index = index
+        self.quality = quality
+        self.cache = ResultCache(max_cache_bytes)
+
+        # corpus rows which are core papers, sorted by row
+        rows, cores = quality.get_core_pairs(corpus_df)
+        order = np.argsort(rows, kind='stable')
+        self._core_rows = rows[order]
+        self._core_ids = cores[order]
+        self.reachable = np.zeros(len(quality.core_frame), dtype=bool)
+        self.reachable[self._core_ids] = True
+
+    def get_rows(self, query: str) -> np.ndarray:
+        """
+        :return: the sorted positions of the corpus rows matching query.
+        """
+        return self.index.evaluate(parse_query(query), self.cache)
+
+    def get_coverage_matrix(self, queries: list) -> pd.DataFrame:
+        """
+        :return: boolean DataFrame with one row per query and one column per core paper, which is True if the core
+                 paper is found by the query.
+        """
+        matrix, _ = self._evaluate_(queries)
+        return pd.DataFrame(matrix, index=pd.Index(queries, name='query'), columns=self.quality.core_frame.index)
+
+    def evaluate(self, queries: list) -> pd.DataFrame:
+        """
+        :return: DataFrame indexed by query with the columns
+                 size: number of matching corpus rows
+                 found: number of core papers found
+                 coverage: found / number of core papers, as FrameQuality.get_core_coverage
+        """
+        matrix, sizes = self._evaluate_(queries)
+        found = matrix.sum(axis=1)
+        return pd.DataFrame({'size': sizes, 'found': found, 'coverage': found / len(self.quality.core_frame)},
+                            index=pd.Index(queries, name='query'))
+
+    def _evaluate_(self, queries):
+        matrix = np.zeros((len(queries), len(self.quality.core_frame)), dtype=bool)
+        sizes = np.zeros(len(queries), dtype=np.int64)
+        for i, query in enumerate(queries):
+            rows = self.get_rows(query)
+            sizes[i] = len(rows)
+            if not len(self._core_rows) or not len(rows):
+                continue
+            found = np.searchsorted(rows, self._core_rows)
+            found[found == len(rows)] = 0
+            matrix[i, self._core_ids[rows[found] == self._core_rows]] = True
+
+        hits = matrix.sum(axis=0)
+        self.quality.hit = [h + int(n) for h, n in zip(self.quality.hit, hits)]
+        return matrix, sizes
@@ -0,0 +1,179 @@
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+
+from slr_helper import instrumentation
+from slr_helper.dedup import hash_keys
+from slr_helper.utils import row_equals, get_matcher
+
+DEFAULT_MEMORY_BUDGET = 1 << 30
+DEFAULT_PARTITIONS = 64
+ROWS_FILE = 'rows.pkl'
+PARTITION_FILE = 'partition-{:04d}.pkl'
+
+# bytes per spilled key in memory while a partition is deduplicated: hash and sequence number plus the sort buffers
+BYTES_PER_KEY = 48
+# oversized partitions are split into SPLIT_FANOUT sub-partitions, at most MAX_SPLIT_LEVELS times
+SPLIT_FANOUT = 16
+MAX_SPLIT_LEVELS = 4
+
+
+def _iter_chunks_(sources, chunksize):
+    from slr_helper.ingest import detect_parser
+    for source in sources:
+        if isinstance(source, pd.DataFrame):
+            yield source
+            continue
+        parser = detect_parser(source)
+        if parser is None:
+            raise ValueError(f'No parser for {source}')
+        yield from parser.get_df_chunks(source, chunksize=chunksize)
+
+
+def _append_partitions_(partition_files, partition_of, hashes, seqs):
+    """
+    Appends the hashes and sequence numbers to the files of their partitions. :return: the number of keys per file.
+    """
+    order = np.argsort(partition_of, kind='stable')
+    bounds = np.searchsorted(partition_of[order], np.arange(len(partition_files) + 1))
+    for p in np.flatnonzero(np.diff(bounds)):
+        selected = order[bounds[p]:bounds[p + 1]]
+        with open(partition_files[p], 'ab') as file:
+            pickle.dump((hashes[selected], seqs[selected]), file, protocol=pickle.HIGHEST_PROTOCOL)
+    return np.diff(bounds)
+
+
+def _iter_partition_(file_url):
+    if os.path.exists(file_url):
+        with open(file_url, 'rb') as file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+
+def _load_partition_(file_url):
+    hashes, seqs = [], []
+    for chunk_hashes, chunk_seqs in _iter_partition_(file_url):
+        hashes.append(chunk_hashes)
+        seqs.append(chunk_seqs)
+    if not hashes:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(seqs)
+
+
+def _split_partition_(file_url, divisor):
+    """
+    Streams the partition into SPLIT_FANOUT sub-partitions by the next digits of the hashes (hash // divisor), so
+    equal keys stay together. :return: 2-tuple (sub-partition files, number of keys per file)
+    """
+    sub_files = [f'{file_url}.{i}' for i in range(SPLIT_FANOUT)]
+    sizes = np.zeros(SPLIT_FANOUT, dtype=np.int64)
+    for hashes, seqs in _iter_partition_(file_url):
+        partition_of = ((hashes // np.uint64(divisor)) % np.uint64(SPLIT_FANOUT)).astype(np.int64)
+        sizes += _append_partitions_(sub_files, partition_of, hashes, seqs)
+    os.remove(file_url)
+    return sub_files, sizes
+
+
+def _dedup_partition_(file_url, size, memory_budget, divisor, level=0):
+    """
+    Partitions larger than memory_budget are split recursively before they are loaded.
+
+    :param size: number of keys in the partition.
+    :param divisor: product of the partition counts of all levels above, see _split_partition_.
+    :return: the sequence numbers of the first occurrence of every key in the partition.
+    """
+    if size * BYTES_PER_KEY > memory_budget:
+        if level < MAX_SPLIT_LEVELS:
+            sub_files, sizes = _split_partition_(file_url, divisor)
+            return np.concatenate([_dedup_partition_(sub_file, sub_size, memory_budget, divisor * SPLIT_FANOUT,
+                                                     level + 1) for sub_file, sub_size in zip(sub_files, sizes)])
+        # only a few keys occurring very often remain, which no split can separate
+        instrumentation.event('external_dedup.oversized_partition',
+                              f'A partition of {size} keys exceeds the memory budget of {memory_budget} bytes')
+    hashes, seqs = _load_partition_(file_url)
+    # the keys were spilled in input order, so the first index of each hash is its first occurrence
+    _, first = np.unique(hashes, return_index=True)
+    return seqs[first]
+
+
+def drop_duplicates_external(sources, equal_func=row_equals, memory_budget=DEFAULT_MEMORY_BUDGET,
+                             partitions=DEFAULT_PARTITIONS, workers=None, chunksize=10000, directory=None):
+    """
+    Generator yielding the rows of sources without duplicates, in their original order and keeping the first
+    occurrence of every key (like Util.merge_frames), while the input never has to fit into memory at once.
+
+    The rows are spilled to disk as they arrive and the 64-bit hashes of their dedup keys are hash-partitioned into
+    spill files. The partitions are deduplicated independently and in parallel, which determines the sequence numbers
+    of the surviving rows. Finally, the spilled rows are read back in order and only the survivors are yielded.
+    Rows without key (NaN) are always kept.
+
+    Memory: besides one chunk, the partitions being deduplicated (about 48 bytes per row each) and a bitmap of 1 byte
+    per input row are held. workers is reduced so that the concurrently deduplicated partitions fit into
+    memory_budget, and partitions which exceed their share of memory_budget on their own are split on disk until
+    they fit. Only a key occurring more than memory_budget / 48 times cannot be split, such a partition is loaded
+    anyway and reported as instrumentation event.
+
+    Example:
+        files = ['ieee.csv', 'acm.bib', 'scopus.bib']
+        for chunk in drop_duplicates_external(files, memory_budget=256 << 20):
+            chunk.to_csv('merged.csv', mode='a', header=not os.path.exists('merged.csv'), index=False)
+
+    :param sources: iterable of DataFrames (chunks) and/or file paths, read in chunks (see ingest.detect_parser)
+    :param equal_func: a key based strategy such as the default Util.row_equals or dedup.KeyMatcher
+    :param memory_budget: bytes available for deduplicating the partitions (the bitmap not included).
+    :param partitions: number of spill partitions.
+    :param workers: number of partitions deduplicated concurrently. Default: os.cpu_count()
+    :param chunksize: rows per chunk read from files and yielded.
+    :param directory: directory for the temporary spill files. Default: the system's temporary directory
+    """
+    matcher = get_matcher(equal_func)
+    if not hasattr(matcher, 'keys'):
+        raise ValueError('External deduplication requires a key based equal_func, e.g. dedup.KeyMatcher')
+
+    with tempfile.TemporaryDirectory(prefix='slr_helper-dedup-', dir=directory) as spill_dir:
+        partition_files = [os.path.join(spill_dir, PARTITION_FILE.format(p)) for p in range(partitions)]
+
+        # 1. spill the rows in input order and their key hashes by partition
+        n_rows, n_chunks, key_masks = 0, 0, []
+        partition_sizes = np.zeros(partitions, dtype=np.int64)
+        with open(os.path.join(spill_dir, ROWS_FILE), 'wb') as rows_file:
+            for chunk in _iter_chunks_(sources, chunksize):
+                if not len(chunk):
+                    continue
+                pickle.dump(chunk, rows_file, protocol=pickle.HIGHEST_PROTOCOL)
+                keys = matcher.keys(chunk)
+                has_key = keys.notna().to_numpy()
+                hashes = hash_keys(keys[has_key])
+                seqs = np.arange(n_rows, n_rows + len(chunk))[has_key]
+                n_rows += len(chunk)
+                n_chunks += 1
+                key_masks.append(has_key)
+
+                partition_of = (hashes % np.uint64(partitions)).astype(np.int64)
+                partition_sizes += _append_partitions_(partition_files, partition_of, hashes, seqs)
+
+        # 2. find the survivors of every partition; rows without key are always kept
+        keep = ~np.concatenate(key_masks) if key_masks else np.zeros(0, dtype=bool)
+        del key_masks
+        largest = int(partition_sizes.max()) * BYTES_PER_KEY
+        workers = max(1, min(workers or os.cpu_count() or 1, memory_budget // max(largest, 1)))
+        budget = memory_budget // workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for survivors in executor.map(_dedup_partition_, partition_files, partition_sizes, [budget] * partitions,
+                                          [partitions] * partitions):
+                keep[survivors] = True
+
+        # 3. read the rows back in order and yield the survivors
+        offset = 0
+        with open(os.path.join(spill_dir, ROWS_FILE), 'rb') as rows_file:
+            for _ in range(n_chunks):
+                chunk = pickle.load(rows_file)
+                yield chunk[keep[offset:offset + len(chunk)]]
+                offset += len(chunk)
@@ -0,0 +1,455 @@
+import os
+import re
+import bisect
+import pickle
+import numpy as np
+import pandas as pd
+
+INDEX_VERSION = 1
+MAPPED_META_FILE = 'meta.pkl'
+INDEXED_COLUMNS = ['title', 'abstract', 'keywords']
+
+# Xplore field names (lower case) -> indexed column, None searches all indexed columns
+FIELDS = {'document title': 'title',
+          'title': 'title',
+          'abstract': 'abstract',
+          'index terms': 'keywords',
+          'author keywords': 'keywords',
+          'ieee terms': 'keywords',
+          'inspec controlled terms': 'keywords',
+          'inspec non-controlled terms': 'keywords',
+          'keywords': 'keywords',
+          'all metadata': None,
+          'full text & metadata': None,
+          'full text .and. metadata': None
+          }
+
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+# words, and ';' which separates the joined keywords and must not be bridged by phrases
+TOKEN_PATTERN = re.compile(r'[^\W_]+|;')
+QUERY_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|(:)|([^\s()":]+))')
+
+
+def tokenize(text: str) -> tuple:
+    """
+    :return: (tokens, positions) of the lower case words in text. ';' advances the position without a token.
+    """
+    tokens, positions, position = [], [], 0
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token != ';':
+            tokens.append(token)
+            positions.append(position)
+        position += 1
+    return tokens, positions
+
+
+def _lex_query_(query: str) -> list:
+    lexemes, pos = [], 0
+    query = query.strip()
+    while pos < len(query):
+        match = QUERY_TOKEN_PATTERN.match(query, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f'Cannot parse query at position {pos}: {query}')
+        pos = match.end()
+        if match.group(1):
+            lexemes.append(('(', None))
+        elif match.group(2):
+            lexemes.append((')', None))
+        elif match.group(3) is not None:
+            lexemes.append(('quoted', match.group(3)))
+        elif match.group(4):
+            lexemes.append((':', None))
+        elif match.group(5) in OPERATORS:
+            lexemes.append((match.group(5), None))
+        else:
+            lexemes.append(('word', match.group(5)))
+    return lexemes
+
+
+class _QueryParser:
+
+    def __init__(self, query):
+        self.query = query
+        self.lexemes = _lex_query_(query)
+        self.pos = 0
+
+    def _peek_(self, offset=0):
+        pos = self.pos + offset
+        return self.lexemes[pos][0] if pos < len(self.lexemes) else None
+
+    def _next_(self):
+        lexeme = self.lexemes[self.pos]
+        self.pos += 1
+        return lexeme
+
+    def parse(self):
+        node = self._or_()
+        if self.pos != len(self.lexemes):
+            raise ValueError(f'Unexpected {self.lexemes[self.pos][0]} in query: {self.query}')
+        return node
+
+    def _or_(self):
+        node = self._and_()
+        while self._peek_() == 'OR':
+            self._next_()
+            node = ('or', node, self._and_())
+        return node
+
+    def _and_(self):
+        node = self._unary_()
+        while self._peek_() in ('AND', 'NOT', '(', 'quoted', 'word'):
+            kind = self._peek_()
+            if kind == 'AND':
+                self._next_()
+                node = ('and', node, self._unary_())
+            elif kind == 'NOT':
+                self._next_()
+                node = ('and', node, ('not', self._unary_()))
+            else:  # adjacent operands
+                node = ('and', node, self._unary_())
+        return node
+
+    def _unary_(self):
+        if self._peek_() == 'NOT':
+            self._next_()
+            return ('not', self._unary_())
+        return self._operand_(None)
+
+    def _operand_(self, field):
+        kind = self._peek_()
+        if kind == '(':
+            self._next_()
+            node = self._or_()
+            if self._peek_() != ')':
+                raise ValueError(f'Missing ) in query: {self.query}')
+            self._next_()
+            return node if field is None else _with_field_(node, field)
+        if kind in ('quoted', 'word'):
+            _, value = self._next_()
+            if field is None and self._peek_() == ':':
+                self._next_()
+                name = value.lower()
+                if name not in FIELDS:
+                    raise ValueError(f'Unknown field "{value}" in query: {self.query}')
+                return self._operand_(FIELDS[name] or '*')
+            return _term_node_(value, field if field != '*' else None)
+        raise ValueError(f'Unexpected {kind or "end"} in query: {self.query}')
+
+
+def _with_field_(node, field):
+    field = field if field != '*' else None
+    if node[0] in ('term', 'prefix', 'phrase'):
+        return (node[0], field, node[2]) if node[1] is None else node
+    return (node[0],) + tuple(_with_field_(child, field) for child in node[1:])
+
+
+def _term_node_(value, field):
+    prefix = value.endswith('*')
+    tokens, _ = tokenize(value.rstrip('*'))
+    if not tokens:
+        raise ValueError(f'"{value}" contains no searchable word')
+    if prefix:
+        if len(tokens) > 1:
+            return ('and', ('phrase', field, tuple(tokens[:-1])), ('prefix', field, tokens[-1]))
+        return ('prefix', field, tokens[0])
+    if len(tokens) > 1:
+        return ('phrase', field, tuple(tokens))
+    return ('term', field, tokens[0])
+
+
+def parse_query(query: str) -> tuple:
+    """
+    Parses an Xplore style boolean query, e.g. '("Document Title":review OR "Abstract":"systematic review") AND
+    softw* NOT "Index Terms":hardware', into a tree of tuples:
+        ('and', a, b), ('or', a, b), ('not', a),
+        ('term', field, token), ('prefix', field, token), ('phrase', field, tokens)
+    where field is an indexed column or None for all of them. Operators are upper case, adjacent operands are joined
+    by AND and 'a NOT b' means a AND NOT b. The trees are hashable, which allows to memoize sub queries.
+    """
+    return _QueryParser(query).parse()
+
+
+class InvertedIndex:
+    """
+    Positional inverted index over the title, abstract and keywords columns, which answers Xplore style boolean
+    queries (see parse_query) without scanning the texts.
+
+    Rows are identified by their position in the order they were added, i.e. for the concatenation of all added
+    frames (such as Corpus.to_frame(), if every frame returned by Corpus.add is added).
+
+    Example:
+        index = InvertedIndex()
+        index.add(df)
+        df.iloc[index.search('"Abstract":"systematic review" AND softw*')]
+        index.save('./corpus/index.pkl')
+    """
+
+    def __init__(self, columns=None):
+        """
+        :param columns: the indexed columns. Default: INDEXED_COLUMNS
+        """
+        self.columns = list(columns or INDEXED_COLUMNS)
+        self.n_rows = 0
+        # column -> token -> list of (rows, positions) chunks, sorted by row and position
+        self._postings = {col: {} for col in self.columns}
+        self._vocabulary = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def add(self, frame: pd.DataFrame):
+        """
+        Appends the rows of frame to the index. Missing columns are treated as empty.
+        """
+        for col in self.columns:
+            if col in frame.columns:
+                self._add_column_(col, frame[col].tolist())
+        self.n_rows += len(frame)
+        self._vocabulary = {}
+
+    def _add_column_(self, col, texts):
+        tokens, rows, positions = [], [], []
+        for row, text in enumerate(texts, self.n_rows):
+            if not isinstance(text, str):
+                continue
+            row_tokens, row_positions = tokenize(text)
+            tokens.extend(row_tokens)
+            rows.extend([row] * len(row_tokens))
+            positions.extend(row_positions)
+        if not tokens:
+            return
+
+        codes, uniques = pd.factorize(np.asarray(tokens, dtype=object))
+        order = np.argsort(codes, kind='stable')
+        rows = np.asarray(rows, dtype=np.int64)[order]
+        positions = np.asarray(positions, dtype=np.int64)[order]
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        postings = self._postings[col]
+        for code, token in enumerate(uniques):
+            start, end = bounds[code], bounds[code + 1]
+            postings.setdefault(token, []).append((rows[start:end], positions[start:end]))
+
+    def _get_postings_(self, col, token):
+        chunks = self._postings[col].get(token)
+        if not chunks:
+            return None
+        if len(chunks) > 1:
+            chunks[:] = [(np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]))]
+        return chunks[0]
+
+    def _get_vocabulary_(self, col):
+        if col not in self._vocabulary:
+            self._vocabulary[col] = sorted(self._postings[col])
+        return self._vocabulary[col]
+
+    def _fields_(self, field):
+        if field is None:
+            return self.columns
+        return [field] if field in self._postings else []
+
+    def _term_(self, field, token):
+        rows = [self._get_postings_(col, token) for col in self._fields_(field)]
+        return self._union_([_distinct_(p[0]) for p in rows if p is not None])
+
+    def _prefix_(self, field, stem):
+        rows = []
+        for col in self._fields_(field):
+            vocabulary = self._get_vocabulary_(col)
+            start = bisect.bisect_left(vocabulary, stem)
+            end = bisect.bisect_left(vocabulary, stem + '\U0010ffff')
+            rows.extend(_distinct_(self._get_postings_(col, token)[0]) for token in vocabulary[start:end])
+        return self._union_(rows)
+
+    def _phrase_(self, field, tokens):
+        rows = []
+        for col in self._fields_(field):
+            postings = [(self._get_postings_(col, token), offset) for offset, token in enumerate(tokens)]
+            if any(p is None for p, _ in postings):
+                continue
+            keys = None
+            # a row matches if token i occurs at position p + i for the position p of the first token, start with the
+            # rarest token to keep the intersections small
+            for (token_rows, token_positions), offset in sorted(postings, key=lambda p: len(p[0][0])):
+                token_keys = (token_rows << 32) + (token_positions - offset)
+                keys = token_keys if keys is None else _intersect_(keys, token_keys)
+            if keys is not None and len(keys):
+                rows.append(_distinct_(keys >> 32))
+        return self._union_(rows)
+
+    def _union_(self, arrays):
+        arrays = [a for a in arrays if len(a)]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        if len(arrays) == 1:
+            return arrays[0]
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for a in arrays:
+            mask[a] = True
+        return np.flatnonzero(mask)
+
+    def evaluate(self, node, cache=None) -> np.ndarray:
+        """
+        :param node: a query tree, see parse_query
+        :param cache: optional dict, which memoizes the results of all sub queries. Clear it after add.
+        :return: the sorted positions of the matching rows.
+        """
+        if cache is not None and node in cache:
+            return cache[node]
+        kind = node[0]
+        if kind == 'term':
+            result = self._term_(node[1], node[2])
+        elif kind == 'prefix':
+            result = self._prefix_(node[1], node[2])
+        elif kind == 'phrase':
+            result = self._phrase_(node[1], node[2])
+        elif kind == 'not':
+            mask = np.ones(self.n_rows, dtype=bool)
+            mask[self.evaluate(node[1], cache)] = False
+            result = np.flatnonzero(mask)
+        elif kind == 'and':
+            left = self.evaluate(node[1], cache)
+            result = _intersect_(left, self.evaluate(node[2], cache)) if len(left) else left
+        elif kind == 'or':
+            result = self._union_([self.evaluate(node[1], cache), self.evaluate(node[2], cache)])
+        else:
+            raise ValueError(f'Unknown query node {kind}')
+        if cache is not None:
+            cache[node] = result
+        return result
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        :param query: Xplore style boolean query, see parse_query
+        :return: the sorted positions of the matching rows.
+        """
+        return self.evaluate(parse_query(query))
+
+    def mask(self, query: str) -> np.ndarray:
+        """
+        :return: boolean array with one entry per indexed row, True for the rows matching query.
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+    def save(self, file_url):
+        for col, postings in self._postings.items():
+            for token in postings:
+                self._get_postings_(col, token)
+        with open(file_url + '.tmp', 'wb') as file:
+            pickle.dump({'version': INDEX_VERSION, 'columns': self.columns, 'n_rows': self.n_rows,
+                         'postings': self._postings}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_url + '.tmp', file_url)
+
+    def save_mapped(self, directory):
+        """
+        Writes the postings as numpy files into directory, which MappedIndex(directory) maps without loading them.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for col in self.columns:
+            tokens = sorted(self._postings[col])
+            postings = [self._get_postings_(col, token) for token in tokens]
+            encoded = [token.encode('utf-8') for token in tokens]
+            arrays = {'token_data': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                      'token_offsets': np.concatenate(([0], np.cumsum([len(t) for t in encoded], dtype=np.int64))),
+                      'starts': np.concatenate(([0], np.cumsum([len(p[0]) for p in postings], dtype=np.int64))),
+                      'rows': np.concatenate([p[0] for p in postings] or [np.zeros(0, dtype=np.int64)]),
+                      'positions': np.concatenate([p[1] for p in postings] or [np.zeros(0, dtype=np.int64)])}
+            for name, array in arrays.items():
+                np.save(os.path.join(directory, f'{col}.{name}.npy'), array)
+        # the metadata is written last, it marks the index as complete
+        with open(os.path.join(directory, MAPPED_META_FILE), 'wb') as file:
+            pickle.dump({'version': INDEX_VERSION, 'columns': self.columns, 'n_rows': self.n_rows}, file)
+
+    @classmethod
+    def load(cls, file_url) -> 'InvertedIndex':
+        with open(file_url, 'rb') as file:
+            state = pickle.load(file)
+        if state['version'] != INDEX_VERSION:
+            raise ValueError(f'{file_url} has index version {state["version"]}, expected {INDEX_VERSION}')
+        index = cls(state['columns'])
+        index.n_rows = state['n_rows']
+        index._postings = state['postings']
+        return index
+
+
+class _MappedPostings:
+    """
+    Read-only postings of one column in memory-mapped files (see InvertedIndex.save_mapped): the sorted tokens as
+    utf-8 buffer with offsets and the concatenated rows and positions of all tokens with the start of each token.
+    Behaves like the sorted vocabulary (len, indexing and slicing) and like the postings dict (get).
+    """
+
+    def __init__(self, directory, col):
+        def load(name):
+            return np.asarray(np.load(os.path.join(directory, f'{col}.{name}.npy'), mmap_mode='r'))
+        self._token_data, self._token_offsets = load('token_data'), load('token_offsets')
+        self._starts, self._rows, self._positions = load('starts'), load('rows'), load('positions')
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def _token_(self, i):
+        return bytes(self._token_data[self._token_offsets[i]:self._token_offsets[i + 1]]).decode('utf-8')
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._token_(j) for j in range(*i.indices(len(self)))]
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._token_(i)
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def get(self, token):
+        i = bisect.bisect_left(self, token)
+        if i == len(self) or self._token_(i) != token:
+            return None
+        start, end = self._starts[i], self._starts[i + 1]
+        return [(self._rows[start:end], self._positions[start:end])]
+
+
+class MappedIndex(InvertedIndex):
+    """
+    Read-only InvertedIndex over postings written by InvertedIndex.save_mapped. The postings are memory-mapped, so
+    processes opening the same directory (e.g. pool workers) share them instead of each loading a copy.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, MAPPED_META_FILE), 'rb') as file:
+            meta = pickle.load(file)
+        if meta['version'] != INDEX_VERSION:
+            raise ValueError(f'{directory} has index version {meta["version"]}, expected {INDEX_VERSION}')
+        super().__init__(meta['columns'])
+        self.n_rows = meta['n_rows']
+        self._postings = {col: _MappedPostings(directory, col) for col in self.columns}
+
+    def add(self, frame: pd.DataFrame):
+        raise TypeError('A MappedIndex is read-only')
+
+    def _get_vocabulary_(self, col):
+        return self._postings[col]
+
+
+def _distinct_(values):
+    """
+    :return: the distinct values of the sorted array values.
+    """
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _intersect_(left, right):
+    """
+    :return: the values contained in both sorted, distinct arrays.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if not len(left):
+        return left
+    found = np.searchsorted(right, left)
+    found[found == len(right)] = 0
+    return left[right[found] == left]
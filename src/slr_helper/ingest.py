@@ -0,0 +1,133 @@
+import os
+import traceback
+import pandas as pd
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from slr_helper.parsers import BibTexParser, IeeeCsvParser, IeeeJsonParser, SlrHelperCsvParser, \
+    SlrHelperParquetParser
+from slr_helper.utils import Util
+
+IEEE_CSV_HEADER = 'Document Title'
+
+
+def detect_parser(file_url):
+    """
+    Chooses the parser by file extension; .csv files are IEEE exports if their header contains 'Document Title',
+    slr_helper csv files otherwise. BibTeX files are parsed without refcounts.
+
+    :return: the parser for file_url or None if the file is not supported.
+    """
+    extension = os.path.splitext(file_url)[1].lower()
+    if extension == '.bib':
+        return BibTexParser(get_refcount=False, workers=1)
+    if extension == '.json':
+        return IeeeJsonParser()
+    if extension == '.parquet':
+        return SlrHelperParquetParser()
+    if extension == '.csv':
+        with open(file_url, 'r', encoding='utf-8-sig', errors='replace') as file:
+            header = file.readline()
+        return IeeeCsvParser() if IEEE_CSV_HEADER in header else SlrHelperCsvParser()
+    return None
+
+
+def _parse_file(parser_factory, file_url):
+    """
+    :return: 2-tuple (frame, error), both None if the file is not supported. The parser is chosen here, so that e.g.
+             an unreadable csv header is reported like a parse error.
+    """
+    try:
+        parser = parser_factory(file_url)
+        return (parser.get_df(file_url) if parser is not None else None), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+class IngestResult:
+
+    def __init__(self, frame: pd.DataFrame, files: list, failures: dict, skipped: list):
+        """
+        :param frame: concatenation of all parsed files in the order of files
+        :param files: successfully parsed files
+        :param failures: file -> traceback of every file that could not be parsed
+        :param skipped: files without a matching parser
+        """
+        self.frame = frame
+        self.files = files
+        self.failures = failures
+        self.skipped = skipped
+
+
+def list_files(directory, recursive=False) -> list:
+    """
+    :return: all files in directory (and its subdirectories, if recursive) in sorted order.
+    """
+    if not recursive:
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                      if os.path.isfile(os.path.join(directory, name)))
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+
+
+def iter_parsed_files(files, workers=None, parser_factory=detect_parser):
+    """
+    Parses the files in a process pool and yields (file, frame, error) in the order of files; frame is None if
+    parsing failed and error contains the traceback, or if parser_factory returned None for the file (error is None).
+    At most 2 * workers parsed frames are pending at any time.
+
+    :param parser_factory: picklable callable file_url -> parser or None, called in the worker processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        files = iter(files)
+        while True:
+            while len(pending) < 2 * workers:
+                file_url = next(files, None)
+                if file_url is None:
+                    break
+                pending.append((file_url, executor.submit(_parse_file, parser_factory, file_url)))
+            if not pending:
+                return
+            file_url, future = pending.popleft()
+            try:
+                df, error = future.result()
+            except Exception:
+                df, error = None, traceback.format_exc()
+            yield file_url, df, error
+
+
+def ingest_directory(directory, workers=None, recursive=False, parser_factory=detect_parser,
+                     equal_func=None) -> IngestResult:
+    """
+    Parses all supported exports (.bib, IEEE .csv, IEEE .json, slr_helper .csv and .parquet) in directory in parallel
+    and concatenates them in sorted file order. Files which cannot be parsed are reported in the result instead of
+    aborting the ingestion.
+
+    :param workers: number of processes. Default: os.cpu_count(); use a small number on memory-constrained hosts,
+                    as at most 2 * workers parsed frames are pending.
+    :param recursive: also ingest the files in subdirectories.
+    :param parser_factory: picklable callable file_url -> parser or None (skip the file), called in the worker
+                           processes. Default: detect_parser
+    :param equal_func: if given, duplicates are dropped while the frames arrive, see Util.drop_duplicates_stream
+    """
+    files = list_files(directory, recursive=recursive)
+    parsed, failures, skipped = [], {}, []
+
+    def frames():
+        for file_url, df, error in iter_parsed_files(files, workers=workers, parser_factory=parser_factory):
+            if error is not None:
+                failures[file_url] = error
+            elif df is None:
+                skipped.append(file_url)
+            else:
+                parsed.append(file_url)
+                yield df
+
+    stream = frames() if equal_func is None else Util.drop_duplicates_stream(frames(), equal_func=equal_func)
+    dfs = list(stream)
+    # a single concatenation with a new index; the parts are released before returning
+    frame = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    del dfs
+    return IngestResult(frame, parsed, failures, skipped)
@@ -0,0 +1,209 @@
+"""
+Lightweight instrumentation of the slow stages (parsing, date parsing, Crossref and Xplore requests, deduplication).
+
+Spans measure the time of a stage, counters count rows, requests, retries, cache hits etc. and events replace the
+warnings, which were printed for every occurrence. While disabled (the default), span returns a shared no-op context
+manager and count returns immediately; events are still recorded and printed, but a message is printed only once per
+parsed file or search (see reset_printed).
+Only the current process is recorded, not e.g. the worker processes of ingest.ingest_directory.
+
+Example:
+    from slr_helper import instrumentation
+
+    instrumentation.enable()
+    df = BibTexParser().get_df('export.bib')
+    print(instrumentation.format_report())
+
+Sinks receive every record as it happens, e.g. instrumentation.enable(JsonLinesSink('trace.jsonl')).
+"""
+import json
+import threading
+import time
+
+from contextlib import nullcontext
+
+MAX_EXAMPLES = 5
+
+_enabled = False
+_lock = threading.Lock()
+_sinks = []
+_counters = {}
+_spans = {}
+_events = {}
+_printed_events = set()
+_NO_SPAN = nullcontext()
+
+
+def enable(*sinks):
+    """
+    Starts recording. Records collected earlier are kept, see reset.
+
+    :param sinks: callables receiving every record (a dict with the keys type, name and value and, for events,
+                  message).
+    """
+    global _enabled
+    _sinks.extend(sinks)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    _sinks.clear()
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+        _events.clear()
+        _printed_events.clear()
+
+
+def reset_printed():
+    """
+    Prints the messages of the following events again, even if they were printed before. Called at the start of every
+    parsed file and search, so that warnings are repeated for every file or query they apply to.
+    """
+    with _lock:
+        _printed_events.clear()
+
+
+def _emit_(record):
+    for sink in _sinks:
+        sink(record)
+
+
+def count(name, value=1):
+    """
+    Adds value to the counter name.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    if _sinks:
+        _emit_({'type': 'counter', 'name': name, 'value': value})
+
+
+class _Span:
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            stats = _spans.setdefault(self.name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        if _sinks:
+            _emit_({'type': 'span', 'name': self.name, 'value': seconds})
+        return False
+
+
+def span(name):
+    """
+    Context manager measuring the time spent in a stage:
+
+        with instrumentation.span('bibtex.read_entries'):
+            ...
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def event(name, message, value=1):
+    """
+    Records a warning. While instrumentation is disabled, the message is also printed, unless the same message was
+    printed before within the current file or search (see reset_printed).
+
+    :param value: number of occurrences the message stands for, e.g. the number of affected entries.
+    """
+    with _lock:
+        stats = _events.setdefault(name, {'count': 0, 'examples': []})
+        stats['count'] += value
+        if len(stats['examples']) < MAX_EXAMPLES:
+            stats['examples'].append(message)
+        printed = _enabled or (name, message) in _printed_events
+        _printed_events.add((name, message))
+    if not printed:
+        print(f'WARNING: {message}')
+    if _sinks:
+        _emit_({'type': 'event', 'name': name, 'value': value, 'message': message})
+
+
+def report() -> dict:
+    """
+    :return: the records collected since the last reset:
+             {'counters': {name: value},
+              'spans': {name: {'calls': int, 'seconds': total, 'max_seconds': float}},
+              'events': {name: {'count': int, 'examples': [first messages]}}}
+    """
+    with _lock:
+        return {'counters': dict(_counters),
+                'spans': {name: {'calls': calls, 'seconds': seconds, 'max_seconds': max_seconds}
+                          for name, (calls, seconds, max_seconds) in _spans.items()},
+                'events': {name: {'count': stats['count'], 'examples': list(stats['examples'])}
+                           for name, stats in _events.items()}
+                }
+
+
+def format_report() -> str:
+    """
+    :return: the report as a table, spans sorted by total time.
+    """
+    data = report()
+    lines = []
+    for name, stats in sorted(data['spans'].items(), key=lambda item: -item[1]['seconds']):
+        lines.append(f'{name:<40}{stats["seconds"]:10.3f} s {stats["calls"]:8d} calls '
+                     f'(max {stats["max_seconds"]:.3f} s)')
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f'{name:<40}{value:12}')
+    for name, stats in sorted(data['events'].items()):
+        lines.append(f'{name:<40}{stats["count"]:12} x, e.g. {stats["examples"][0]}')
+    return '\n'.join(lines)
+
+
+class JsonLinesSink:
+    """
+    Sink appending every record as JSON line to a file.
+    """
+
+    def __init__(self, file_url):
+        self.file_url = file_url
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(dict(record, time=time.time())) + '\n'
+        with self._lock:
+            with open(self.file_url, 'a') as file:
+                file.write(line)
+
+
+class LoggingSink:
+    """
+    Sink forwarding the events (and, with level DEBUG, all records) to a logging.Logger.
+    """
+
+    def __init__(self, logger=None):
+        import logging
+        self.logger = logger or logging.getLogger('slr_helper')
+
+    def __call__(self, record):
+        import logging
+        if record['type'] == 'event':
+            self.logger.warning(record['message'])
+        elif self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('%s %s %s', record['type'], record['name'], record['value'])
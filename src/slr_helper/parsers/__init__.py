@@ -1,6 +1,43 @@
-from .parser import Parser
+# The parsers are imported on first access (PEP 562), so that using one parser does not load the dependencies of the
+# others (e.g. pybtex or pyarrow).
+import importlib
 
-from .bibtex_parser import BibTexParser
-from .ieee_csv_parser import IeeeCsvParser
-from .ieee_json_parser import IeeeJsonParser
-from .slr_helper_csv_parser import SlrHelperCsvParser
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+_LAZY_NAMES = {'Parser': '.parser',
+               'BibTexParser': '.bibtex_parser',
+               'IeeeCsvParser': '.ieee_csv_parser',
+               'IeeeJsonParser': '.ieee_json_parser',
+               'SlrHelperCsvParser': '.slr_helper_csv_parser',
+               'SlrHelperParquetParser': '.slr_helper_parquet_parser',
+               'write_df': '.slr_helper_parquet_parser'
+               }
+
+__all__ = list(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .parser import Parser
+
+    from .bibtex_parser import BibTexParser
+    from .ieee_csv_parser import IeeeCsvParser
+    from .ieee_json_parser import IeeeJsonParser
+    from .slr_helper_csv_parser import SlrHelperCsvParser
+    from .slr_helper_parquet_parser import SlrHelperParquetParser, write_df
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        # submodules, which were loaded by the former eager imports (e.g. slr_helper.utils)
+        try:
+            return importlib.import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
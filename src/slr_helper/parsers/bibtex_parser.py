@@ -1,27 +1,73 @@
 # imports
+import os
+import re
 import pandas as pd
 import numpy as np
 import datetime
 import dateutil.parser as dateparser
+import pybtex.io
 
+from concurrent.futures import ProcessPoolExecutor
 from pybtex.database.input import bibtex
 from functools import reduce
 
+from slr_helper import instrumentation
+from slr_helper.dates import DEFAULT_DATE_PARSER
 from slr_helper.parsers import Parser
-from slr_helper.utils import get_refcount_from_doi, retry_if_failed
+from slr_helper.parsers.ieee_csv_parser import INTEGER_PATTERN, clean_isxn_column
+from slr_helper.refcount import RefcountCache, RefcountFetcher, DEFAULT_TTL
 
 ERROR_ON_MISSING_FIELD = False
 
+ENTRY_TOKEN = re.compile(r'[{}]|^[ \t]*@', re.MULTILINE)
+MACRO_ENTRY = re.compile(r'@\s*(string|preamble)\b', re.IGNORECASE)
+CROSSREF_FIELD = re.compile(r'\bcrossref\s*=', re.IGNORECASE)
+
 
 # search for all possible columns that can be retrieved from the current bibtex file
 def get_fields(bibdata):
-    columns = []
+    columns = {}  # insertion ordered set
+    for bib_id in bibdata.entries:
+        columns.update(dict.fromkeys(bibdata.entries[bib_id].fields.keys()))
+    return list(columns)
+
+
+def split_entry_blocks(text):
+    """
+    Splits the content of a bibtex file at every line starting with '@' outside of braces, i.e. not within the
+    value of a field.
+
+    :return: 2-tuple (macros, entries) of the @string and @preamble blocks, which every part of the file depends on,
+             and all other blocks in order of appearance.
+    """
+    starts, depth = [], 0
+    for m in ENTRY_TOKEN.finditer(text):
+        token = m.group(0)
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            starts.append(m.start())
+    macros, entries = [], []
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        block = text[start:end]
+        (macros if MACRO_ENTRY.match(block.lstrip()) else entries).append(block)
+    return macros, entries
+
+
+def parse_entry_rows(text, encoding=None):
+    """
+    Parses bibtex text. :return: one dict per entry with the authors string and the raw fields of the entry.
+    """
+    bibdata = bibtex.Parser(encoding=encoding).parse_string(text)
+    rows = []
     for bib_id in bibdata.entries:
-        fields = bibdata.entries[bib_id].fields
-        for field in fields.keys():
-            if field not in columns:
-                columns.append(field)
-    return columns
+        bibentry = bibdata.entries[bib_id]
+        row = {'authors': create_author_str(bibentry.persons)}
+        row.update(bibentry.fields)
+        rows.append(row)
+    return rows
 
 
 def person_to_str(x):
@@ -94,13 +140,50 @@ def clean_isxn(x):
     return x
 
 
+def get_page_column(pages, pos):
+    """
+    Page number at pos of the '–' separated pages: -1 if it is empty, -2 if it is not a number.
+    """
+    val = pages.astype(str).str.split('–').str[pos]
+    numbers = pd.to_numeric(val.where(val.str.fullmatch(INTEGER_PATTERN)), errors='coerce')
+    unknown = numbers.isna() & (val != '')
+    if unknown.any():
+        instrumentation.event('bibtex.unknown_page', f'unknown page in {unknown.sum()} entries, e.g. '
+                                                     f'{val[unknown].iloc[0]}', int(unknown.sum()))
+    return numbers.where(val != '', -1).fillna(-2).astype(int)
+
+
 class BibTexParser(Parser):
 
-    def __init__(self, get_refcount=True, refcount_tries=3, refcount_wait_after_fail=5) -> None:
-        super().__init__()
+    def __init__(self, get_refcount=True, refcount_tries=3, refcount_wait_after_fail=5, refcount_workers=8,
+                 refcount_rate=10, use_refcount_cache=True, refcount_cache_file=None, refcount_cache_ttl=DEFAULT_TTL,
+                 refcount_url=None, workers=None, entries_per_worker=1000, compact=False) -> None:
+        """
+        :param get_refcount: retrieve the refcount of every entry with a DOI from Crossref.
+        :param refcount_tries: tries per DOI.
+        :param refcount_wait_after_fail: seconds to wait after the first failure, doubled after every further failure.
+        :param refcount_workers: number of concurrent Crossref requests.
+        :param refcount_rate: maximum number of Crossref requests per second.
+        :param use_refcount_cache: store retrieved refcounts in a persistent DOI -> refcount cache.
+        :param refcount_cache_file: path of the cache. Default: see refcount.RefcountCache
+        :param refcount_cache_ttl: seconds until a cached refcount is fetched again.
+        :param refcount_url: url the DOI is appended to. Default: refcount.CROSSREF_URL
+        :param workers: number of processes normalizing the entries. Default: os.cpu_count()
+        :param entries_per_worker: minimal number of entries per process. Smaller files are parsed in-process.
+        :param compact: return frames in the compact schema, see schema.to_compact
+        """
+        super().__init__(compact=compact)
         self.get_refcount = get_refcount
         self.refcount_tries = refcount_tries
         self.refcount_wait_after_fail = refcount_wait_after_fail
+        self.refcount_workers = refcount_workers
+        self.refcount_rate = refcount_rate
+        self.use_refcount_cache = use_refcount_cache
+        self.refcount_cache_file = refcount_cache_file
+        self.refcount_cache_ttl = refcount_cache_ttl
+        self.refcount_url = refcount_url
+        self.workers = workers
+        self.entries_per_worker = entries_per_worker
         self.target_columns = ['title',
                                'authors',
                                'isbn',
@@ -141,76 +224,119 @@ class BibTexParser(Parser):
         self.bibtex_manual_keys = [x for x in self.target_columns if x not in self.bibtex_rename_map.values()]
 
     def get_df(self, file_url):
-        # open a bibtex file
-        parser = bibtex.Parser()
-        bibdata = parser.parse_file(file_url)
+        instrumentation.reset_printed()
+        with instrumentation.span('bibtex.read_entries'):
+            bib_df = self._read_entries_(file_url)
+        instrumentation.count('bibtex.rows', len(bib_df))
 
-        fields = get_fields(bibdata)
+        fields = [x for x in bib_df.columns if x != 'authors']
         for key in self.bibtex_rename_map.keys():
             if key not in fields and key != 'authors':
                 if ERROR_ON_MISSING_FIELD:
                     assert False, "Missing value in fields! {}".format(key)
                 else:
-                    print("WARNING: Missing value in fields! {}".format(key))
-                    fields.append(key)
-
-        bib_df = pd.DataFrame.from_dict(
-            [create_dict_from_bibentry(bibdata.entries[bib_id], fields) for bib_id in bibdata.entries])
-
-        # apply renaming
-        bib_df = bib_df.rename(self.bibtex_rename_map)
+                    instrumentation.event('bibtex.missing_field', "Missing value in fields! {}".format(key))
+                    bib_df[key] = ''
+        if 'pages' not in bib_df.columns:
+            bib_df['pages'] = ''
 
         # Take care of missing columns
-        # published_in
-        def get_published_in(x):
-            if 'journal' in x and x['journal'] != '':
-                return x['journal']
-            if 'booktitle' in x and x['booktitle'] != '':
-                return x['booktitle']
-
-            print('unable to figure out published_in')
-            return ''
-
-        bib_df['published_in'] = bib_df.apply(get_published_in, axis=1)
-
-        def _get_page(x, pos=0):
-            val = str(x).split('–')[pos]
-            if val == "": return -1
-            try:
-                return int(val)
-            except ValueError:
-                print(f'unknown page {val}')
-                return -2
+        # published_in: journal, else booktitle
+        published_in = pd.Series('', index=bib_df.index, dtype=object)
+        for col in ['booktitle', 'journal']:
+            if col in bib_df.columns:
+                published_in = bib_df[col].where(bib_df[col] != '', published_in)
+        unknown = (published_in == '').sum()
+        if unknown:
+            instrumentation.event('bibtex.unknown_published_in',
+                                  f'unable to figure out published_in of {unknown} entries', int(unknown))
+        bib_df['published_in'] = published_in
 
         # set start_page & end_page
         # bib_df.pages is either "start-end" or "page"
-        bib_df['start_page'] = bib_df.pages.apply(lambda x: _get_page(x, 0))
-        bib_df['end_page'] = bib_df.pages.apply(lambda x: _get_page(x, -1))
+        bib_df['start_page'] = get_page_column(bib_df.pages, 0)
+        bib_df['end_page'] = get_page_column(bib_df.pages, -1)
 
         # make sure numpages fits!
-        bib_df['numpages'] = bib_df.apply((lambda x: int(x['numpages']) if x['numpages'] else calculate_numpages(x)),
-                                          axis=1)
-
-        bib_df['date'] = bib_df.issue_date.apply(bibtex_time_to_datetime)
+        calculated = (bib_df.end_page - bib_df.start_page + 1).where((bib_df.end_page != -1) &
+                                                                    (bib_df.start_page != -1), -1)
+        has_numpages = bib_df.numpages != ''
+        calculated[has_numpages] = bib_df.numpages[has_numpages].astype(int)
+        bib_df['numpages'] = calculated.astype(int)
+
+        # dates are parsed once per distinct value
+        codes, parsed = DEFAULT_DATE_PARSER.parse_column(bib_df.issue_date)
+        bib_df['date'] = pd.Series(parsed.to_numpy()[codes], index=bib_df.index)
+        date_years = np.array([x.year if x else np.nan for x in parsed], dtype=float)[codes]
+        date_months = np.array([x.month if x else 0 for x in parsed], dtype=float)[codes]
 
         bib_df['day'] = 0
 
-        bib_df['year'] = bib_df.apply(check_year, axis=1)
+        # verify year and month, see check_year and check_month
+        has_year = (bib_df.year != '').to_numpy()
+        year = np.where(np.isnan(date_years), 0, date_years)
+        year[has_year] = bib_df.year[has_year].astype(int)
+        bib_df['year'] = year.astype(int)
 
-        bib_df['month'] = bib_df.apply(check_month, axis=1)
+        has_month = (bib_df.month != '').to_numpy()
+        month_names = {x: datetime.datetime.strptime(x, '%B').date().month for x in bib_df.month[has_month].unique()}
+        month = np.where(date_years == bib_df['year'].to_numpy(), date_months, 0)
+        month[has_month] = bib_df.month[has_month].map(month_names)
+        bib_df['month'] = month.astype(int)
 
         # clean ISBN and ISSN
         # Both can end with 'X' so we cannot cast them to numbers :-(
-        bib_df.isbn = bib_df.isbn.fillna("Unknown")
-        bib_df.issn = bib_df.issn.fillna("Unknown")
-
-        bib_df.isbn = bib_df.isbn.apply(clean_isxn)
-        bib_df.issn = bib_df.issn.apply(clean_isxn)
+        bib_df.isbn = clean_isxn_column(bib_df.isbn.replace('', np.nan))
+        bib_df.issn = clean_isxn_column(bib_df.issn.replace('', np.nan))
 
+        bib_df['refcount'] = -1
+        bib_df = bib_df[self.target_columns]
         if self.get_refcount:
-            bib_df['refcount'] = bib_df['doi'].apply(lambda x: retry_if_failed(get_refcount_from_doi, x,
-                                                                               self.refcount_tries,
-                                                                               self.refcount_wait_after_fail, -1))
+            return self.add_refcounts(bib_df)
+        return self._to_schema_(bib_df)
+
+    def add_refcounts(self, df):
+        """
+        Sets the refcount column of a parsed frame from Crossref (and the refcount cache), e.g. of a frame which was
+        parsed and cached without refcounts, see cache.FrameCache.
+        """
+        df = df.copy()
+        with instrumentation.span('bibtex.refcounts'):
+            df['refcount'] = self._get_refcount_fetcher_().get_refcounts(df['doi'].astype(object)).to_numpy()
+        return self._to_schema_(df)
+
+    def _get_refcount_fetcher_(self):
+        cache = RefcountCache(self.refcount_cache_file, ttl=self.refcount_cache_ttl) if self.use_refcount_cache else None
+        options = {'base_url': self.refcount_url} if self.refcount_url else {}
+        return RefcountFetcher(workers=self.refcount_workers, rate=self.refcount_rate, tries=self.refcount_tries,
+                               wait_after_fail=self.refcount_wait_after_fail, cache=cache, **options)
+
+    def _read_entries_(self, file_url):
+        """
+        Parses the file into a frame with the authors and all raw fields of every entry (missing fields are '').
+        Large files are split into blocks of entries, which are parsed in a process pool.
+        """
+        encoding = bibtex.Parser().encoding
+        with pybtex.io.open_unicode(file_url, encoding=encoding) as file:
+            text = file.read()
+
+        macros, entries = split_entry_blocks(text)
+        workers = self.workers or os.cpu_count() or 1
+        parts = min(workers, len(entries) // self.entries_per_worker)
+        if parts <= 1 or CROSSREF_FIELD.search(text):
+            # crossrefs between entries require parsing the whole file at once
+            rows = parse_entry_rows(text, encoding)
         else:
-            bib_df['refcount'] = -1
-        return bib_df[self.target_columns]
+            size = -(-len(entries) // parts)
+            texts = [''.join(macros + entries[i:i + size]) for i in range(0, len(entries), size)]
+            try:
+                with ProcessPoolExecutor(max_workers=parts) as executor:
+                    rows = [row for part in executor.map(parse_entry_rows, texts, [encoding] * len(texts))
+                            for row in part]
+            except Exception as e:
+                # a block could not be parsed on its own, e.g. due to unbalanced braces: parse the file at once
+                instrumentation.event('bibtex.split_failed', f'{file_url} is parsed at once, as a block failed: {e}')
+                rows = parse_entry_rows(text, encoding)
+
+        bib_df = pd.DataFrame.from_records(rows, columns=None if rows else ['authors'])
+        return bib_df.fillna('')
@@ -2,8 +2,15 @@ import pandas as pd
 import numpy as np
 import datetime
 
+from slr_helper import instrumentation
+from slr_helper.dates import DateParser
 from slr_helper.parsers import Parser
 
+IEEE_DATE_FORMAT = '%d %b %Y'
+IEEE_DATE_COLUMNS = ['Issue Date', 'Meeting Date', 'Online Date', 'Date Added To Xplore']
+INTEGER_PATTERN = r'\s*[+-]?\d+\s*'  # what int() accepts as a string
+IEEE_DATE_PARSER = DateParser(formats=[(None, IEEE_DATE_FORMAT)], use_dateutil=False)
+
 
 def ieee_time_to_datetime(x):
     return datetime.datetime.strptime(x, '%d %b %Y').date() if x and (type(x) != float or not np.isnan(x)) else None
@@ -35,10 +42,59 @@ def clean_isxn(x):
     return x
 
 
+def ieee_time_column_to_datetime(column):
+    """
+    Vectorized ieee_time_to_datetime, but returns a datetime64 series (NaT for missing or malformed dates). Every
+    distinct date is parsed once, see IEEE_DATE_PARSER.
+    """
+    codes, parsed = IEEE_DATE_PARSER.parse_column(column)
+    return pd.Series(pd.to_datetime(parsed).to_numpy()[codes], index=column.index)
+
+
+def to_date_objects(column):
+    """
+    Converts a datetime64 series to an object series of datetime.date (None for NaT), the representation of the
+    'date' column.
+    """
+    return column.dt.date.astype(object).where(column.notna(), None)
+
+
+def clean_page_nr_column(column):
+    """
+    Vectorized clean_page_nr.
+    """
+    numbers = pd.to_numeric(column, errors='coerce')
+    if not pd.api.types.is_numeric_dtype(column):
+        # int() only accepts strings of integers, e.g. not '12.0'
+        is_str = column.map(type) == str
+        is_int_str = column.where(is_str, '').astype(str).str.fullmatch(INTEGER_PATTERN)
+        numbers = numbers.where(~is_str | is_int_str)
+    return numbers.fillna(-1).astype(int)
+
+
+def get_numpages_column(start_page, end_page):
+    """
+    Vectorized get_numpages for the cleaned start_page and end_page columns.
+    """
+    valid = (start_page != 0) & (end_page != 0) & (start_page != -1) & (end_page != -1)
+    return (end_page - start_page + 1).where(valid, -1).astype(int)
+
+
+def clean_isxn_column(column):
+    """
+    Vectorized clean_isxn after replacing missing values by 'Unknown'.
+    """
+    column = column.fillna('Unknown')
+    if pd.api.types.is_numeric_dtype(column):
+        return column
+    cleaned = column.str.replace('-', '', regex=False)
+    return cleaned.where(cleaned.notna(), column)
+
+
 class IeeeCsvParser(Parser):
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, compact=False) -> None:
+        super().__init__(compact=compact)
 
         self.target_columns = ['title',
                                'authors',
@@ -81,45 +137,52 @@ class IeeeCsvParser(Parser):
         self.ieee_manual_keys = [x for x in self.target_columns if x not in self.ieee_rename_map.values()]
 
     def get_df(self, file_url):
-        ieee = pd.read_csv(file_url)
+        with instrumentation.span('ieee_csv.read'):
+            ieee = pd.read_csv(file_url, usecols=self._is_used_column_)
+        return self._normalize_(ieee)
+
+    def get_df_chunks(self, file_url, chunksize=10000):
+        """
+        Reads the export in chunks of chunksize rows, only keeping the columns which are needed, and yields each
+        normalized chunk. Memory stays bounded by the chunk size regardless of the file size.
+        """
+        for ieee in pd.read_csv(file_url, usecols=self._is_used_column_, chunksize=chunksize):
+            yield self._normalize_(ieee)
+
+    def _is_used_column_(self, column):
+        return column in self.ieee_rename_map or column in IEEE_DATE_COLUMNS
+
+    def _normalize_(self, ieee):
+        with instrumentation.span('ieee_csv.normalize'):
+            return self._normalize_columns_(ieee)
+
+    def _normalize_columns_(self, ieee):
+        instrumentation.count('ieee_csv.rows', len(ieee))
         ieee = self._rename_existing_(ieee)
 
-        for time in ['Issue Date', 'Meeting Date', 'Online Date', 'Date Added To Xplore']:
-            ieee[time] = ieee[time].apply(ieee_time_to_datetime)
-
-        ieee['date'] = ieee.apply(self._ieee_date_selector_, axis=1)
+        # first available date of IEEE_DATE_COLUMNS
+        date = None
+        for time in IEEE_DATE_COLUMNS:
+            column = ieee_time_column_to_datetime(ieee[time])
+            date = column if date is None else date.combine_first(column)
+        ieee['date'] = to_date_objects(date)
 
         # Month and day are empty
         # set month from 'date' if 'date'.year matches 'year' else 0
-        ieee['month'] = ieee.apply((lambda x: int(x['date'].month) if self._check_year_matching_date_(x) else 0),
-                                   axis=1)
-        ieee['day'] = ieee.apply((lambda x: int(x['date'].day) if self._check_year_matching_date_(x) else 0), axis=1)
+        matching = ieee['year'] == date.dt.year
+        ieee['month'] = date.dt.month.where(matching, 0).astype(int)
+        ieee['day'] = date.dt.day.where(matching, 0).astype(int)
 
-        ieee['end_page'] = ieee['end_page'].apply(clean_page_nr)
-        ieee['start_page'] = ieee['start_page'].apply(clean_page_nr)
-        ieee['numpages'] = ieee.apply(get_numpages, axis=1)
+        ieee['end_page'] = clean_page_nr_column(ieee['end_page'])
+        ieee['start_page'] = clean_page_nr_column(ieee['start_page'])
+        ieee['numpages'] = get_numpages_column(ieee['start_page'], ieee['end_page'])
 
         # clean ISBN and ISSN
         # Both can end with 'X' so we cannot cast them to numbers :-(
-        ieee.isbn = ieee.isbn.fillna("Unknown")
-        ieee.issn = ieee.issn.fillna("Unknown")
-
-        ieee.isbn = ieee.isbn.apply(clean_isxn)
-        ieee.issn = ieee.issn.apply(clean_isxn)
+        ieee.isbn = clean_isxn_column(ieee.isbn)
+        ieee.issn = clean_isxn_column(ieee.issn)
 
-        return ieee[self.target_columns]
+        return self._to_schema_(ieee[self.target_columns])
 
     def _rename_existing_(self, df):
         return df.rename(columns=self.ieee_rename_map)
-
-    def _ieee_date_selector_(self, x):
-        if x['Issue Date']:
-            return x['Issue Date']
-        if x['Meeting Date']:
-            return x['Meeting Date']
-        if x['Online Date']:
-            return x['Online Date']
-        return x['Date Added To Xplore']
-
-    def _check_year_matching_date_(self, x):
-        return x['year'] == x['date'].year
@@ -1,31 +1,45 @@
+import numpy as np
 import pandas as pd
 import json
 import dateutil.parser as dateparser
-from functools import reduce
-from slr_helper.parsers.ieee_csv_parser import clean_isxn, clean_page_nr, get_numpages
+from slr_helper import instrumentation
+from slr_helper.dates import DEFAULT_DATE_PARSER
+from slr_helper.parsers.ieee_csv_parser import clean_isxn_column, clean_page_nr_column, get_numpages_column
 from slr_helper.parsers import Parser
 
 
 def full_name_to_auth(name):
     names = name.split()
-    for i, n in enumerate(names[:-1]):
-        names[i] = n[0] + '.'
-    return reduce(lambda a, b: a + ' ' + b, names)
+    return ' '.join([n[0] + '.' for n in names[:-1]] + names[-1:])
 
 
 def get_author_str_from_dict(authors: dict):
     l_auth = authors['authors']  # get list of authors
     if not l_auth:
         return ''
-    names = []
-    for i in range(1, len(l_auth) + 1):
-        for author in l_auth:
-            if int(author['author_order']) == i:
-                names.append(author['full_name'])
-                break
+    # first author of every position 1..len(l_auth), in order
+    by_order = {}
+    for author in l_auth:
+        by_order.setdefault(int(author['author_order']), author['full_name'])
+    names = [by_order[i] for i in range(1, len(l_auth) + 1) if i in by_order]
+    return ', '.join(full_name_to_auth(x) for x in names)
 
-    names = [full_name_to_auth(x) for x in names]
-    return reduce(lambda a, b: a + ', ' + b, names)
+
+def get_index_terms_str(index_terms: dict):
+    return ';'.join(term for terms in index_terms.values() for term in terms['terms'])
+
+
+def parse_date_str(date_str):
+    """
+    Parses the last date of a date span like '3-5 Nov. 2020'. :return: the date or None
+    """
+    if not date_str:
+        return None
+    # for the sake of simplicity we take the last date from the span!
+    try:
+        return dateparser.parse(date_str.split('-')[-1])
+    except dateparser.ParserError:
+        return None
 
 
 def get_date(row):
@@ -36,14 +50,14 @@ def get_date(row):
     if not date_str or type(date_str) != str:
         return None
 
-    # for the sake of simplicity we take the last date from the span!
-    date_str = date_str.split('-')[-1]
+    return parse_date_str(date_str)
 
-    try:
-        date = dateparser.parse(date_str)
-        return date
-    except dateparser.ParserError:
-        return None
+
+def is_truthy(column):
+    """
+    Vectorized bool(x), but False for NaN.
+    """
+    return column.notna().to_numpy() & column.to_numpy(dtype=object).astype(bool)
 
 
 class IeeeJsonParser(Parser):
@@ -68,6 +82,7 @@ class IeeeJsonParser(Parser):
                       ]
 
     def get_df(self, file_url: str):
+        instrumentation.reset_printed()
         with open(file_url) as file:
             search_result = json.load(file)
 
@@ -76,59 +91,68 @@ class IeeeJsonParser(Parser):
     def get_df_from_result_str(self, search_result: str):
         return self.get_df_from_result(search_result=json.loads(search_result))
 
-    def get_df_from_result(self, search_result: dict):
+    def get_df_from_result(self, search_result: dict, warn_incomplete=True):
+        """
+        :param warn_incomplete: warn if the result does not contain all hits of the query. Disable it for pages of a
+                                paged search.
+        """
         if not search_result or 'articles' not in search_result:
-            return pd.DataFrame(columns=self.target_columns)
+            return self._to_schema_(pd.DataFrame(columns=self.target_columns))
 
         hits = int(search_result['total_records'])
         result_length = len(search_result['articles'])
-        if hits != result_length:
-            print(f'WARNING: Query hat {hits} hits but API returned only {result_length} results.')
+        if warn_incomplete and hits != result_length:
+            instrumentation.event('ieee_json.incomplete_result',
+                                  f'Query hat {hits} hits but API returned only {result_length} results.')
 
-        # process authors
-        articles = search_result['articles']
-        for article in articles:
-            article['authors'] = get_author_str_from_dict(article['authors'])
+        with instrumentation.span('ieee_json.normalize'):
+            return self._normalize_(search_result['articles'])
 
-        # process index_terms
-        for article in articles:
-            index_terms = article['index_terms']
-            new_terms = []
-            for type in index_terms.keys():
-                new_terms += index_terms[type]['terms']
-            article['index_terms'] = reduce(lambda a, b: a + ';' + b, new_terms) if new_terms else ''
+    def _normalize_(self, articles):
+        instrumentation.count('ieee_json.rows', len(articles))
+        if not articles:
+            # e.g. a page past the end or a saved-query refresh without new records
+            return self._to_schema_(pd.DataFrame(columns=self.target_columns))
+        df = pd.DataFrame.from_records(articles)
 
-        df = pd.DataFrame.from_dict(search_result['articles'])
+        # process authors and index_terms, the articles are not modified
+        df['authors'] = [get_author_str_from_dict(article['authors']) for article in articles]
+        df['index_terms'] = [get_index_terms_str(article.get('index_terms') or {}) for article in articles]
 
         required_columns = ['isbn', 'issn', 'start_page', 'end_page', 'pdf_url', 'html_url', 'publication_year',
-                            'publication_title', 'index_terms']
+                            'publication_title', 'publication_date', 'conference_dates']
         for col in required_columns:
             if col not in df.columns:
                 df[col] = None
 
-        df.isbn = df.isbn.fillna('Unknown')
-        df.issn = df.issn.fillna('Unknown')
-        df['isbn'] = df['isbn'].apply(clean_isxn)
-        df['issn'] = df['issn'].apply(clean_isxn)
+        df['isbn'] = clean_isxn_column(df['isbn'])
+        df['issn'] = clean_isxn_column(df['issn'])
 
-        df['start_page'] = df['start_page'].apply(clean_page_nr)
-        df['end_page'] = df['end_page'].apply(clean_page_nr)
-        df['numpages'] = df.apply(get_numpages, axis=1)
+        df['start_page'] = clean_page_nr_column(df['start_page'])
+        df['end_page'] = clean_page_nr_column(df['end_page'])
+        df['numpages'] = get_numpages_column(df['start_page'], df['end_page'])
 
-        df['url'] = df.apply(lambda x: x['pdf_url'] if x['pdf_url'] else x['html_url'], axis=1)
+        df['url'] = df['pdf_url'].where(is_truthy(df['pdf_url']), df['html_url'])
 
-        df['date'] = df.apply(get_date, axis=1)
-        df['year'] = df.apply(lambda x: int(x['publication_year']) if x['publication_year'] else x['date'].year, axis=1)
+        # publication_date, else the conference_dates; parsed once per distinct value
+        date_str = df['publication_date'].where(is_truthy(df['publication_date']), df['conference_dates'])
+        date_str = date_str.where(is_truthy(date_str) & (date_str.map(type) == str).to_numpy(), '')
+        codes, parsed = DEFAULT_DATE_PARSER.parse_column(date_str.str.split('-').str[-1])
+        df['date'] = pd.Series(parsed.to_numpy()[codes], index=df.index)
+        date_parts = np.array([(0, 0, 0) if pd.isna(x) else (x.year, x.month, x.day) for x in parsed],
+                              dtype=int).reshape(-1, 3)[codes]
+
+        has_year = is_truthy(df['publication_year'])
+        year = date_parts[:, 0].copy()
+        year[has_year] = df['publication_year'][has_year].astype(int)
+        df['year'] = year
         # Month and day are empty
         # set month from 'date' if 'date'.year matches 'year' else 0
-        df['month'] = df.apply((lambda x: int(x['date'].month) if self._check_year_matching_date_(x) else 0),
-                               axis=1)
-        df['day'] = df.apply((lambda x: int(x['date'].day) if self._check_year_matching_date_(x) else 0), axis=1)
+        matching = year == date_parts[:, 0]
+        df['month'] = np.where(matching, date_parts[:, 1], 0)
+        df['day'] = np.where(matching, date_parts[:, 2], 0)
 
         df = df.rename(
             columns={'index_terms': 'keywords', 'publication_title': 'published_in', 'citing_paper_count': 'refcount'})
 
-        return df[self.target_columns]
-
-    def _check_year_matching_date_(self, x):
-        return x['year'] == x['date'].year
+        return self._to_schema_(df[self.target_columns])
@@ -1,8 +1,29 @@
 from abc import ABC, abstractmethod
 
+from slr_helper.schema import to_compact
+
 
 class Parser(ABC):
 
+    def __init__(self, compact=False):
+        """
+        :param compact: return frames in the compact schema (categorical, Arrow string and small integer columns), see
+                        schema.to_compact
+        """
+        self.compact = compact
+
     @abstractmethod
     def get_df(self, file_url: str):
         pass
+
+    def get_df_chunks(self, file_url: str, chunksize=10000):
+        """
+        Yields the parsed frame in chunks of chunksize rows. Parsers which can read their input incrementally override
+        this to keep memory bounded, the default parses the whole file first.
+        """
+        df = self.get_df(file_url)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def _to_schema_(self, df):
+        return to_compact(df) if self.compact else df
@@ -1,8 +1,18 @@
 import pandas as pd
 from .parser import Parser
+from slr_helper.schema import TARGET_COLUMNS
 
 
 class SlrHelperCsvParser(Parser):
+    target_columns = TARGET_COLUMNS
 
     def get_df(self, file_url: str):
-        return pd.read_csv(file_url)
+        return self._to_schema_(pd.read_csv(file_url))
+
+    def get_df_chunks(self, file_url: str, chunksize=10000):
+        """
+        Reads only the target_columns of the file and yields them in chunks of chunksize rows. Columns missing in the
+        file are filled with NaN.
+        """
+        for df in pd.read_csv(file_url, usecols=lambda column: column in self.target_columns, chunksize=chunksize):
+            yield self._to_schema_(df.reindex(columns=self.target_columns))
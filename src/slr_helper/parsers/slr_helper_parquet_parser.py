@@ -0,0 +1,66 @@
+import pandas as pd
+from .parser import Parser
+
+SCHEMA_VERSION = '1'
+SCHEMA_VERSION_KEY = b'slr_helper.schema_version'
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError('The slr_helper parquet format requires pyarrow, install it with: pip install slr_helper[parquet]')
+
+
+def write_df(df: pd.DataFrame, file_url: str, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression='zstd'):
+    """
+    Writes df as slr_helper parquet file, which keeps all dtypes and can be read partially with
+    SlrHelperParquetParser. Sort df by a column (e.g. year) before writing to make filters on it skip most row groups.
+
+    :param row_group_size: rows per row group, the unit filters can skip.
+    """
+    pa = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SCHEMA_VERSION_KEY] = SCHEMA_VERSION.encode()
+    pa.parquet.write_table(table.replace_schema_metadata(metadata), file_url, row_group_size=row_group_size,
+                           compression=compression)
+
+
+class SlrHelperParquetParser(Parser):
+    """
+    Reads files written by write_df.
+    """
+
+    def get_df(self, file_url: str, columns=None, filters=None, years=None, memory_map=False):
+        """
+        :param columns: read only these columns, e.g. ['title', 'doi']
+        :param filters: pyarrow filters, e.g. [('year', '>=', 2015)]. Row groups whose statistics do not match are not
+                        read at all.
+        :param years: shortcut for the filter first_year <= year <= last_year, given as (first_year, last_year)
+        :param memory_map: memory map the file instead of reading it.
+        """
+        pa = _import_pyarrow()
+        if years is not None:
+            filters = list(filters or []) + [('year', '>=', years[0]), ('year', '<=', years[1])]
+        table = pa.parquet.read_table(file_url, columns=columns, filters=filters, memory_map=memory_map)
+        self._check_version_(table.schema, file_url)
+        return self._to_schema_(table.to_pandas())
+
+    def get_df_chunks(self, file_url: str, chunksize=10000, columns=None):
+        pa = _import_pyarrow()
+        file = pa.parquet.ParquetFile(file_url)
+        self._check_version_(file.schema_arrow, file_url)
+        for batch in file.iter_batches(batch_size=chunksize, columns=columns):
+            yield self._to_schema_(batch.to_pandas())
+
+    @staticmethod
+    def _check_version_(schema, file_url):
+        version = (schema.metadata or {}).get(SCHEMA_VERSION_KEY)
+        if version is None:
+            raise ValueError(f'{file_url} is not a slr_helper parquet file')
+        if version.decode() != SCHEMA_VERSION:
+            raise ValueError(f'{file_url} has schema version {version.decode()}, expected {SCHEMA_VERSION}')
@@ -1,16 +1,81 @@
+import numpy as np
+import pandas as pd
+
 from slr_helper import Util
+from slr_helper.utils import row_equals, get_matcher
+
 
 class FrameQuality:
 
-    def __init__(self, core_df):
+    def __init__(self, core_df, equal_func=row_equals):
+        """
+        :param core_df: frame of the core papers, which should be found by a good search.
+        :param equal_func: The function (row -> bool) used to determine if two rows are equal. Default: Util.row_equals
+                           For key based strategies (such as the default) the keys of the core frame are computed once
+                           and every frame is scored with a single vectorized lookup.
+        """
         self.core_frame = core_df
+        self.equal_func = equal_func
         self.hit = [0] * len(core_df)
 
+        matcher = get_matcher(equal_func)
+        if hasattr(matcher, 'keys'):
+            self._matcher = matcher
+            self._core_keys = matcher.keys(core_df).reset_index(drop=True)
+            self._core_has_key = self._core_keys.notna().to_numpy()
+        else:
+            self._matcher = None
+
+    def _get_core_mask(self, frame) -> np.ndarray:
+        """
+        :return: boolean array, which is True for every core paper that is contained in frame.
+        """
+        if self._matcher is None:
+            mask = np.zeros(len(self.core_frame), dtype=bool)
+            hits = Util.find_duplicate_indices_two_frames(self.core_frame, frame, equal_func=self.equal_func,
+                                                          short_circuit=True)
+            for i, _ in hits:
+                mask[i] = True
+            return mask
+
+        return self._core_keys.isin(self._matcher.keys(frame).dropna()).to_numpy() & self._core_has_key
+
+    def get_core_pairs(self, frame) -> tuple:
+        """
+        :return: (rows, cores), two int arrays of the same length, which pair the positions of the rows of frame with
+                 the positions of the core papers they are equal to.
+        """
+        if self._matcher is None:
+            pairs = Util.find_duplicate_indices_two_frames(self.core_frame, frame, equal_func=self.equal_func)
+            pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+            return pairs[:, 1].copy(), pairs[:, 0].copy()
+
+        keys = self._matcher.keys(frame).reset_index(drop=True)
+        core_keys = self._core_keys[self._core_has_key]
+        pairs = pd.DataFrame({'key': keys, 'row': np.arange(len(keys))}).dropna(subset=['key']).merge(
+            pd.DataFrame({'key': core_keys, 'core': core_keys.index}), on='key')
+        return pairs['row'].to_numpy(dtype=np.int64), pairs['core'].to_numpy(dtype=np.int64)
+
     def get_core_coverage(self, frame):
-        hits = Util.find_duplicate_indices_two_frames(self.core_frame, frame, short_circuit=True)
-        for i,_ in hits:
+        mask = self._get_core_mask(frame)
+        for i in np.flatnonzero(mask):
             self.hit[i] += 1
-        return len(hits) / len(self.core_frame)
+        return int(mask.sum()) / len(self.core_frame)
+
+    def get_core_coverage_matrix(self, frames: list) -> pd.DataFrame:
+        """
+        Scores all frames (e.g. the result of IeeeSearch.search_all) at once. The hit stats are updated as if
+        get_core_coverage was called for each frame.
+
+        :return: boolean DataFrame with one row per frame and one column per core paper, which is True if the core
+                 paper is contained in the frame. Its row-wise mean is the core coverage of each frame.
+        """
+        matrix = np.zeros((len(frames), len(self.core_frame)), dtype=bool)
+        for i, frame in enumerate(frames):
+            matrix[i] = self._get_core_mask(frame)
+        hits = matrix.sum(axis=0)
+        self.hit = [h + int(n) for h, n in zip(self.hit, hits)]
+        return pd.DataFrame(matrix, columns=self.core_frame.index)
 
     def get_hit_stats(self):
         return self.hit.copy()
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ['title', 'abstract', 'keywords']
+WORD_PATTERN = r'[^\W\d_]{2,}'  # words of at least two letters
+DEFAULT_FEATURES = 1 << 20
+DEFAULT_BLOCK_SIZE = 10000
+
+
+def _import_scipy_sparse():
+    try:
+        import scipy.sparse
+        return scipy.sparse
+    except ImportError:
+        raise ImportError('Ranking requires scipy, install it with: pip install slr_helper[ranking]')
+
+
+def get_texts(frame: pd.DataFrame, columns=TEXT_COLUMNS) -> pd.Series:
+    """
+    :return: the lower case concatenation of the text columns of every row (missing columns and values are empty).
+    """
+    text = pd.Series('', index=frame.index, dtype=object)
+    for col in columns:
+        if col in frame.columns:
+            text = text + ' ' + frame[col].where(frame[col].map(type) == str, '')
+    return text.str.lower()
+
+
+class HashingTfidf:
+    """
+    Sparse TF-IDF vectors of the texts of a frame. Words are hashed into n_features columns instead of building a
+    vocabulary, so vectors of different frames and blocks are comparable without holding all texts at once.
+    """
+
+    def __init__(self, n_features=DEFAULT_FEATURES, columns=TEXT_COLUMNS):
+        """
+        :param n_features: number of hash buckets; collisions are negligible for 2^20 and typical vocabularies.
+        :param columns: the concatenated text columns.
+        """
+        self.n_features = n_features
+        self.columns = columns
+        self.n_docs = 0
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+
+    def term_counts(self, frame: pd.DataFrame):
+        """
+        :return: CSR matrix with one row per row of frame holding the counts of its hashed words.
+        """
+        sparse = _import_scipy_sparse()
+        words = get_texts(frame, self.columns).str.findall(WORD_PATTERN)
+        lengths = words.str.len().to_numpy()
+        # every distinct word is hashed once
+        codes, uniques = pd.factorize(words.explode().dropna())
+        buckets = (pd.util.hash_pandas_object(pd.Series(uniques), index=False).to_numpy()
+                   % np.uint64(self.n_features)).astype(np.int64)[codes]
+        rows = np.repeat(np.arange(len(frame)), lengths)
+        counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, buckets)),
+                                   shape=(len(frame), self.n_features))
+        counts.sum_duplicates()
+        return counts
+
+    def partial_fit(self, frame: pd.DataFrame):
+        """
+        Adds the rows of frame to the document frequencies.
+        """
+        counts = self.term_counts(frame)
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += len(frame)
+        return self
+
+    def get_idf(self) -> np.ndarray:
+        return (np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1).astype(np.float32)
+
+    def transform(self, frame: pd.DataFrame, idf=None):
+        """
+        :return: CSR matrix of the L2-normalized TF-IDF vectors (sublinear tf) of the rows of frame.
+        """
+        sparse = _import_scipy_sparse()
+        idf = self.get_idf() if idf is None else idf
+        vectors = self.term_counts(frame)
+        vectors.data = (1 + np.log(vectors.data)) * idf[vectors.indices]
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(vectors).tocsr()
+
+
+class CoreRanker:
+    """
+    Ranks candidate papers (e.g. merged search results) by the cosine similarity of their title, abstract and
+    keywords to the most similar core papers, e.g. to screen the most promising candidates first.
+
+    The candidates are processed in blocks of block_size rows: every block is vectorized and multiplied with the
+    sparse core matrix, and only the top k core papers per candidate are kept. Memory is bounded by the block size
+    (about block_size * (number of core papers + words per candidate) values), not by the number of candidates.
+    Requires scipy (pip install slr_helper[ranking]).
+
+    Example:
+        ranking = CoreRanker(core_df).rank(candidates, k=3)
+        candidates.loc[ranking.sort_values('score', ascending=False).index]
+    """
+
+    def __init__(self, core_df: pd.DataFrame, n_features=DEFAULT_FEATURES, block_size=DEFAULT_BLOCK_SIZE,
+                 columns=TEXT_COLUMNS):
+        """
+        :param core_df: frame of the core papers.
+        :param n_features: number of hash buckets of the word vectors.
+        :param block_size: candidates vectorized and scored at once.
+        :param columns: the text columns compared.
+        """
+        self.core_frame = core_df
+        self.n_features = n_features
+        self.block_size = block_size
+        self.columns = columns
+
+    def _blocks_(self, frame):
+        for start in range(0, len(frame), self.block_size):
+            yield start, frame.iloc[start:start + self.block_size]
+
+    def rank(self, candidates: pd.DataFrame, k=5) -> pd.DataFrame:
+        """
+        The word weights (IDF) are computed from the candidates and the core papers in a first pass over the blocks.
+
+        :param k: number of most similar core papers reported per candidate.
+        :return: DataFrame with the index of candidates and the columns
+                 score: highest cosine similarity (0 to 1) to any core paper
+                 core_1, score_1, ..., core_k, score_k: index label and similarity of the k most similar core papers
+        """
+        k = min(k, len(self.core_frame))
+        vectorizer = HashingTfidf(self.n_features, self.columns)
+        vectorizer.partial_fit(self.core_frame)
+        for _, block in self._blocks_(candidates):
+            vectorizer.partial_fit(block)
+        idf = vectorizer.get_idf()
+
+        core = vectorizer.transform(self.core_frame, idf).T.tocsc()
+        top_cores = np.zeros((len(candidates), k), dtype=np.int64)
+        top_scores = np.zeros((len(candidates), k), dtype=np.float32)
+        for start, block in self._blocks_(candidates):
+            scores = vectorizer.transform(block, idf).dot(core).toarray()
+            if k < scores.shape[1]:
+                best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                best = np.tile(np.arange(scores.shape[1]), (len(block), 1))
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            top_cores[start:start + len(block)] = np.take_along_axis(best, order, axis=1)
+            top_scores[start:start + len(block)] = np.take_along_axis(best_scores, order, axis=1)
+
+        ranking = pd.DataFrame({'score': top_scores[:, 0] if k else 0.0}, index=candidates.index)
+        core_labels = self.core_frame.index.to_numpy()
+        for i in range(k):
+            ranking[f'core_{i + 1}'] = core_labels[top_cores[:, i]]
+            ranking[f'score_{i + 1}'] = top_scores[:, i]
+        return ranking
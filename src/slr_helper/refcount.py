@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+
+from slr_helper import instrumentation
+from slr_helper.utils import CROSSREF_URL, RateLimiter, get_cache_dir, get_refcount_from_doi, retry_with_backoff
+
+DEFAULT_CACHE_FILE = 'crossref_refcount.json'
+DEFAULT_TTL = 30 * 24 * 60 * 60  # refcounts change slowly, refresh them monthly
+NOT_FOUND = -2  # cached for DOIs Crossref does not know, reported as -1
+
+
+class RefcountCache:
+    """
+    Persistent DOI -> refcount cache in a json file. Entries older than ttl seconds are treated as missing.
+    """
+
+    def __init__(self, file_url=None, ttl=DEFAULT_TTL):
+        """
+        :param file_url: path of the cache file. Default: crossref_refcount.json in utils.get_cache_dir()
+        :param ttl: time to live of an entry in seconds.
+        """
+        self.file_url = file_url if file_url else os.path.join(get_cache_dir(), DEFAULT_CACHE_FILE)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(self.file_url):
+            try:
+                with open(self.file_url, 'r') as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                instrumentation.event('refcount.unreadable_cache',
+                                      f'Ignoring unreadable refcount cache {self.file_url}')
+
+    def get(self, doi):
+        """
+        :return: the cached refcount of doi or None if it is missing or expired.
+        """
+        entry = self._entries.get(doi)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def set(self, doi, refcount):
+        with self._lock:
+            self._entries[doi] = [refcount, time.time()]
+
+    def save(self):
+        directory = os.path.dirname(self.file_url)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        with self._lock:
+            entries = {doi: entry for doi, entry in self._entries.items() if now - entry[1] <= self.ttl}
+        tmp_url = f'{self.file_url}.{os.getpid()}.tmp'
+        with open(tmp_url, 'w') as file:
+            json.dump(entries, file)
+        os.replace(tmp_url, self.file_url)
+
+
+class RefcountFetcher:
+    """
+    Retrieves the refcounts ('is-referenced-by-count') of DOIs from Crossref. Empty and duplicate DOIs are skipped,
+    cached DOIs are not requested again and the remaining ones are fetched concurrently by a bounded thread pool,
+    limited to rate requests per second and retried with exponential backoff. DOIs which Crossref rejects (e.g. 404)
+    are not retried and cached like refcounts, so they are not requested again before the cache entry expires.
+    """
+
+    def __init__(self, workers=8, rate=10, tries=3, wait_after_fail=1, cache=None, base_url=CROSSREF_URL,
+                 timeout=10):
+        """
+        :param workers: number of concurrent requests.
+        :param rate: maximum number of requests per second (0 for unlimited).
+        :param tries: number of tries per DOI.
+        :param wait_after_fail: seconds to wait after the first failed try, doubled after every further failure.
+        :param cache: RefcountCache to use or None to always fetch.
+        :param base_url: url the DOI is appended to. Change it e.g. to use a local stub server.
+        :param timeout: timeout of a single request in seconds.
+        """
+        self.workers = workers
+        self.tries = tries
+        self.wait_after_fail = wait_after_fail
+        self.cache = cache
+        self.base_url = base_url
+        self.timeout = timeout
+        self._limiter = RateLimiter(rate)
+
+    def fetch(self, doi) -> int:
+        """
+        Single request for doi, respecting the rate limit.
+
+        :return: the refcount, NOT_FOUND if Crossref rejects the DOI or -1 on a failure which is worth retrying.
+        """
+        self._limiter.acquire()
+        return get_refcount_from_doi(doi, base_url=self.base_url, timeout=self.timeout, not_found_value=NOT_FOUND)
+
+    def get_refcounts(self, dois: pd.Series) -> pd.Series:
+        """
+        :param dois: series of DOIs, may contain empty strings, NaN and duplicates.
+        :return: series with the same index containing the refcount of each DOI or -1 if it is empty or could not be
+                 retrieved.
+        """
+        clean = dois.where(dois.map(type) == str, '').str.strip()
+        unique = [doi for doi in clean.unique() if doi]
+
+        refcounts = {}
+        missing = []
+        for doi in unique:
+            cached = self.cache.get(doi) if self.cache is not None else None
+            if cached is None:
+                missing.append(doi)
+            else:
+                refcounts[doi] = cached
+        instrumentation.count('refcount.cache_hits', len(refcounts))
+        instrumentation.count('refcount.cache_misses', len(missing))
+
+        if missing:
+            with instrumentation.span('refcount.fetch'), ThreadPoolExecutor(max_workers=self.workers) as executor:
+                fetched = executor.map(lambda doi: retry_with_backoff(self.fetch, doi, self.tries,
+                                                                      self.wait_after_fail, -1), missing)
+                for doi, refcount in zip(missing, fetched):
+                    refcounts[doi] = refcount
+                    if refcount != -1 and self.cache is not None:
+                        self.cache.set(doi, refcount)
+            if self.cache is not None:
+                self.cache.save()
+
+        return clean.map(lambda doi: max(refcounts.get(doi, -1), -1)).astype(int)
@@ -0,0 +1,72 @@
+import pandas as pd
+
+# columns of the frames returned by all parsers
+TARGET_COLUMNS = ['title',
+                  'authors',
+                  'isbn',
+                  'issn',
+                  'publisher',
+                  'url',
+                  'doi',
+                  'abstract',
+                  'published_in',
+                  'start_page',
+                  'end_page',
+                  'numpages',
+                  'keywords',
+                  'date',
+                  'year',
+                  'month',
+                  'day',
+                  'refcount'
+                  ]
+
+# Compact schema: few distinct values are dictionary encoded, free text is stored as (Arrow-backed if available)
+# strings and numbers use the smallest nullable integer type, which still holds the -1/-2 sentinels.
+CATEGORICAL_COLUMNS = ['isbn', 'issn', 'publisher', 'published_in']
+STRING_COLUMNS = ['title', 'authors', 'url', 'doi', 'abstract', 'keywords']
+INTEGER_COLUMNS = {'start_page': 'Int32',
+                   'end_page': 'Int32',
+                   'numpages': 'Int32',
+                   'year': 'Int16',
+                   'month': 'Int8',
+                   'day': 'Int8',
+                   'refcount': 'Int32'
+                   }
+
+
+def get_string_dtype():
+    """
+    :return: 'string[pyarrow]' if pyarrow is installed, else 'string'.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return 'string'
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the target columns contained in df to the compact schema; other columns are kept as they are. The
+    values do not change, so deduplication and FrameQuality work as before.
+
+    Note: concatenating frames with different categories yields object columns again, apply to_compact to the result.
+    """
+    df = df.copy()
+    string_dtype = get_string_dtype()
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(string_dtype)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    if 'date' in df.columns:
+        try:
+            df['date'] = pd.to_datetime(df['date'], errors='coerce').astype('datetime64[ns]')
+        except (TypeError, ValueError):
+            pass  # e.g. mixed time zones, keep the objects
+    return df
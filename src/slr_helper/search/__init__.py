@@ -1 +1,32 @@
-from .ieee_search import IeeeSearch
+# The public names are imported on first access (PEP 562), see slr_helper/__init__.py
+import importlib
+
+from typing import TYPE_CHECKING
+
+_LAZY_NAMES = {'IeeeSearch': '.ieee_search',
+               'SavedQueryRegistry': '.saved_queries'
+               }
+
+__all__ = list(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .ieee_search import IeeeSearch
+    from .saved_queries import SavedQueryRegistry
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        # submodules, which were loaded by the former eager imports (e.g. slr_helper.utils)
+        try:
+            return importlib.import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,13 +1,60 @@
 import json
-from ieee_xplore import XPLORE
-from time import sleep
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from slr_helper import instrumentation
 from slr_helper.parsers.ieee_json_parser import IeeeJsonParser
+from slr_helper.search.response_cache import ResponseCache
+from slr_helper.utils import RateLimiter
+
+MAX_RESULTS = 200  # this is the maximum the API will return
+MAX_REQUESTS_PER_SECOND = 10
+
+
+def get_xplore_client_factory():
+    """
+    :return: ieee_xplore.XPLORE, which is only imported when the first request is made.
+    """
+    from ieee_xplore import XPLORE
+    return XPLORE
+
+
+class IncompleteSearchError(Exception):
+    """
+    Raised by IeeeSearch.search_all_pages if some pages could not be retrieved. Pass it as resume to
+    search_all_pages to fetch only the missing pages.
+    """
+
+    def __init__(self, boolean_text, total_records, pages: dict, missing: dict):
+        """
+        :param pages: start record -> frame of every retrieved page
+        :param missing: start record -> exception of every failed page
+        """
+        super().__init__(f'{len(missing)} pages of query {boolean_text} could not be retrieved, starting at records '
+                         f'{sorted(missing)}')
+        self.boolean_text = boolean_text
+        self.total_records = total_records
+        self.pages = pages
+        self.missing = missing
 
 
 class IeeeSearch:
 
-    def __init__(self):
-        self.__int__(api_key=None)
+    def __init__(self, api_key=None, workers=4, rate=MAX_REQUESTS_PER_SECOND, use_cache=False, cache=None,
+                 client_factory=None):
+        """
+        :param api_key: Xplore api key. Default: read from the environment or ./.config/.secret.json
+        :param workers: number of concurrent queries in search_all.
+        :param rate: maximum number of API requests per second, shared by all workers.
+        :param use_cache: reuse raw responses of previous, identical queries (also of other processes) until they
+                          expire after the ttl of the cache. Off by default, so every search is live.
+        :param cache: ResponseCache to use if use_cache. Default: ResponseCache(), which expires after a day
+        :param client_factory: api_key -> client with the interface of ieee_xplore.XPLORE. Default: ieee_xplore.XPLORE
+        """
+        self.__int__(api_key=api_key)
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+        self.cache = (cache if cache is not None else ResponseCache()) if use_cache else None
+        self.client_factory = client_factory
 
     def __int__(self, api_key):
         if not api_key:
@@ -20,28 +67,123 @@ class IeeeSearch:
                 with open(secret_path, 'r') as file:
                     api_key = json.load(file)['xplore-api-key']
             else:
-                print(f'Xplore api key was not provided. Set it either as environment variable {env_var} or in the file'
-                      f' {secret_path} in .xplore-api-key')
+                instrumentation.event('xplore.missing_api_key',
+                                      f'Xplore api key was not provided. Set it either as environment variable '
+                                      f'{env_var} or in the file {secret_path} in .xplore-api-key')
         self._api_key_ = api_key
 
-    def search(self, boolean_text: str):
-        xplore = XPLORE(self._api_key_)
-        xplore.maximumResults(200)  # this is the maximum the API will return
+    def _call_api_(self, boolean_text: str, start_record=1, filters=None, use_cache=True) -> str:
+        """
+        Raw json response of the query, from the cache if possible.
+
+        :param filters: Xplore result filters (see XPLORE.resultsFilter), e.g. {'start_date': '20200101'}
+        :param use_cache: False requests the response even if it is cached (and updates the cache).
+        """
+        params = {'max_results': MAX_RESULTS, 'start_record': start_record}
+        if filters:
+            params['filters'] = dict(filters)
+        if self.cache is not None and use_cache:
+            data = self.cache.get(boolean_text, **params)
+            if data is not None:
+                instrumentation.count('xplore.cache_hits')
+                return data
+
+        client_factory = self.client_factory or get_xplore_client_factory()
+        xplore = client_factory(self._api_key_)
+        xplore.maximumResults(MAX_RESULTS)
+        if start_record != 1:
+            xplore.startingResult(start_record)
         xplore.booleanText(boolean_text)
+        for key, value in (filters or {}).items():
+            xplore.resultsFilter(key, value)
+
+        self.rate_limiter.acquire()
+        instrumentation.count('xplore.requests')
+        with instrumentation.span('xplore.request'):
+            data = xplore.callAPI()
+
+        if self.cache is not None and data:
+            self.cache.put(boolean_text, data, **params)
+        return data
 
-        data = xplore.callAPI()
+    def search(self, boolean_text: str, all_pages=False, filters=None, use_cache=True):
+        """
+        :param all_pages: retrieve all results instead of only the first MAX_RESULTS, see search_all_pages.
+        :param filters: Xplore result filters, e.g. {'start_date': '20200101'} for records inserted since 2020.
+        :param use_cache: False bypasses the response cache for this search, so its results are live.
+        """
+        instrumentation.reset_printed()
+        if all_pages:
+            return self.search_all_pages(boolean_text, filters=filters, use_cache=use_cache)
+
+        data = self._call_api_(boolean_text, filters=filters, use_cache=use_cache)
 
         df = IeeeJsonParser().get_df_from_result_str(data)
 
         return df
 
+    def _get_page_(self, boolean_text, start_record, filters=None, use_cache=True):
+        """
+        :return: 2-tuple (total_records, frame) of the page starting at start_record.
+        """
+        result = json.loads(self._call_api_(boolean_text, start_record=start_record, filters=filters,
+                                            use_cache=use_cache))
+        if 'total_records' not in result:
+            raise ValueError(f'Unexpected response: {result}')
+        df = IeeeJsonParser().get_df_from_result(result, warn_incomplete=False)
+        return int(result['total_records']), df
+
+    def search_all_pages(self, boolean_text: str, resume: IncompleteSearchError = None, filters=None,
+                         use_cache=True) -> pd.DataFrame:
+        """
+        Retrieves all results of the query, not only the first MAX_RESULTS. After the first page, the remaining pages
+        are requested concurrently within the rate limit, each is parsed as soon as it arrives and all are
+        concatenated once in the end.
+
+        :param resume: IncompleteSearchError raised by a previous call for this query; only its missing pages are
+                       requested again. With the response cache enabled, simply repeating the call has the same
+                       effect.
+        :param filters: Xplore result filters, see search.
+        :param use_cache: False bypasses the response cache, see search.
+        :raise IncompleteSearchError: if a page could not be retrieved.
+        """
+        if resume is not None:
+            total, pages = resume.total_records, dict(resume.pages)
+        else:
+            total, first = self._get_page_(boolean_text, 1, filters, use_cache)
+            pages = {1: first}
+
+        missing = {}
+        starts = [start for start in range(1, total + 1, MAX_RESULTS) if start not in pages]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._get_page_, boolean_text, start, filters, use_cache): start
+                       for start in starts}
+            for future in as_completed(futures):
+                try:
+                    pages[futures[future]] = future.result()[1]
+                except Exception as e:
+                    missing[futures[future]] = e
+
+        if missing:
+            raise IncompleteSearchError(boolean_text, total, pages, missing)
+        return pd.concat([pages[start] for start in sorted(pages)], ignore_index=True)
+
     def search_all(self, texts, verbose=False):
-        dfs = []
-        for i, text in enumerate(texts):
+        """
+        Runs all queries concurrently on self.workers threads within the rate limit.
+
+        :return: list of the result frames in the order of texts.
+        """
+        texts = list(texts)
+
+        def run(args):
+            i, text = args
             if verbose:
                 print(f'Starting search {i}:\t{text}')
-            dfs.append(self.search(text))
+            df = self.search(text)
             if verbose:
-                print(f'Found: {len(dfs[-1])}')
-            sleep(.1)  # max 10 requests per seconds
-        return dfs
+                print(f'Found {i}: {len(df)}')
+            return df
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(run, enumerate(texts)))
@@ -0,0 +1,72 @@
+import os
+import re
+import json
+import time
+import hashlib
+
+from slr_helper.utils import get_cache_dir
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+OPERATORS = re.compile(r'\b(and|or|not|near|onear)\b', re.IGNORECASE)
+
+
+def normalize_query(boolean_text: str) -> str:
+    """
+    Normalizes a boolean query for use as cache key: whitespace is collapsed, terms are lower-cased and operators
+    upper-cased, as Xplore does not distinguish them.
+    """
+    text = ' '.join(boolean_text.split()).lower()
+    return OPERATORS.sub(lambda m: m.group(0).upper(), text)
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw json responses of the Xplore API, keyed by the normalized boolean query and the request
+    parameters (e.g. start record and page size). Responses expire after ttl seconds, as Xplore keeps adding records.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL):
+        """
+        :param directory: directory of the cache. Default: xplore in utils.get_cache_dir()
+        :param ttl: seconds after which a cached response is no longer returned (None: never).
+        """
+        self.directory = directory if directory else os.path.join(get_cache_dir(), 'xplore')
+        self.ttl = ttl
+
+    def _path_(self, boolean_text, params):
+        key = json.dumps([normalize_query(boolean_text), params], sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, boolean_text: str, **params):
+        """
+        :return: the cached response (str) or None if there is none or it expired.
+        """
+        path = self._path_(boolean_text, params)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'r') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def put(self, boolean_text: str, response: str, **params):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path_(boolean_text, params)
+        tmp_path = f'{path}.{os.getpid()}.{id(response)}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(response)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, boolean_text: str, **params):
+        try:
+            os.remove(self._path_(boolean_text, params))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.directory, name))
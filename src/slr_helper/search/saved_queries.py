@@ -0,0 +1,128 @@
+import os
+import json
+import datetime
+import pandas as pd
+
+from slr_helper.search.ieee_search import IeeeSearch
+from slr_helper.search.response_cache import normalize_query
+
+REGISTRY_VERSION = 1
+WATERMARK_FORMAT = '%Y%m%d'  # format of Xplore's start_date filter
+DEFAULT_OVERLAP_DAYS = 7
+
+
+class SavedQueryRegistry:
+    """
+    Saved boolean queries of a living review, which are refreshed incrementally. For every query the registry
+    records a watermark (the date of its last run) and the DOIs found so far. A refresh only requests the records
+    inserted into Xplore since the watermark (minus overlap_days, as records may become visible with a delay) and
+    returns the results whose DOI was not seen before, so API calls and merge work scale with what is new.
+
+    Example:
+        registry = SavedQueryRegistry('./review/queries.json', IeeeSearch())
+        registry.add('"Abstract":"systematic review" AND softw*')
+        new_rows = registry.refresh_all(corpus=Corpus('./review/corpus'))
+    """
+
+    def __init__(self, file_url, search: IeeeSearch = None, overlap_days=DEFAULT_OVERLAP_DAYS):
+        """
+        :param file_url: json file of the registry, created on the first save.
+        :param search: IeeeSearch used for the refreshes (e.g. with a fake client_factory). Default: IeeeSearch()
+        :param overlap_days: days before the watermark which are requested again.
+        """
+        self.file_url = file_url
+        self.search = search
+        self.overlap_days = overlap_days
+        self._queries = {}
+        if os.path.exists(file_url):
+            with open(file_url, 'r') as file:
+                data = json.load(file)
+            if data.get('version') != REGISTRY_VERSION:
+                raise ValueError(f'{file_url} has registry version {data.get("version")}, expected {REGISTRY_VERSION}')
+            self._queries = data['queries']
+
+    def _save_(self):
+        directory = os.path.dirname(self.file_url)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.file_url + '.tmp', 'w') as file:
+            json.dump({'version': REGISTRY_VERSION, 'queries': self._queries}, file, indent=1)
+        os.replace(self.file_url + '.tmp', self.file_url)
+
+    def _entry_(self, boolean_text):
+        key = normalize_query(boolean_text)
+        if key not in self._queries:
+            raise KeyError(f'Query is not registered: {boolean_text}')
+        return self._queries[key]
+
+    @property
+    def queries(self) -> list:
+        return [entry['query'] for entry in self._queries.values()]
+
+    def add(self, boolean_text: str):
+        """
+        Registers the query; queries which only differ in whitespace or case are the same query.
+        """
+        key = normalize_query(boolean_text)
+        if key not in self._queries:
+            self._queries[key] = {'query': boolean_text, 'watermark': None, 'last_run': None, 'runs': 0,
+                                  'dois': []}
+            self._save_()
+
+    def remove(self, boolean_text: str):
+        self._queries.pop(normalize_query(boolean_text), None)
+        self._save_()
+
+    def get_watermark(self, boolean_text: str):
+        """
+        :return: the date of the last run of the query or None if it never ran.
+        """
+        watermark = self._entry_(boolean_text)['watermark']
+        return datetime.datetime.strptime(watermark, WATERMARK_FORMAT).date() if watermark else None
+
+    def refresh(self, boolean_text: str, corpus=None, today: datetime.date = None) -> pd.DataFrame:
+        """
+        Runs the query live, restricted to the records inserted since its watermark, and advances the watermark. If
+        a page cannot be retrieved, IncompleteSearchError is raised and the watermark is left unchanged.
+
+        :param corpus: Corpus the new results are added to (source 'xplore: <query>'), which also drops the results
+                       already contained in it through other queries or sources.
+        :param today: date of the run. Default: datetime.date.today()
+        :return: the results whose DOI was not found by a previous run of the query (only the rows added to corpus,
+                 if given).
+        """
+        entry = self._entry_(boolean_text)
+        today = today or datetime.date.today()
+        search = self.search if self.search is not None else IeeeSearch()
+
+        filters = None
+        if entry['watermark']:
+            start = self.get_watermark(boolean_text) - datetime.timedelta(days=self.overlap_days)
+            filters = {'start_date': start.strftime(WATERMARK_FORMAT)}
+        # the response cache is bypassed: a stale response would advance the watermark past records never returned
+        df = search.search(entry['query'], all_pages=True, filters=filters, use_cache=False)
+
+        known = set(entry['dois'])
+        dois = df['doi'].where(df['doi'].map(type) == str, '')
+        delta = df[~dois.isin(known) | (dois == '')]
+        entry['dois'] = entry['dois'] + sorted(set(dois[dois != '']) - known)
+        entry['watermark'] = today.strftime(WATERMARK_FORMAT)
+        entry['last_run'] = datetime.datetime.now().isoformat(timespec='seconds')
+        entry['runs'] += 1
+
+        # the corpus is written before the registry, so that an interruption repeats the run instead of losing rows
+        if corpus is not None:
+            delta = corpus.add(delta, source=f'xplore: {entry["query"]}')
+        self._save_()
+        return delta.reset_index(drop=True)
+
+    def refresh_all(self, corpus=None, today: datetime.date = None) -> pd.DataFrame:
+        """
+        Refreshes all queries, see refresh.
+
+        :return: the new results of all queries, duplicates between the queries included unless corpus is given.
+        """
+        deltas = [self.refresh(query, corpus=corpus, today=today) for query in self.queries]
+        if not deltas:
+            return pd.DataFrame()
+        return pd.concat(deltas, ignore_index=True)
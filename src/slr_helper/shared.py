@@ -0,0 +1,268 @@
+import os
+import shutil
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from slr_helper.dedup import hash_keys
+from slr_helper.evaluation import ResultCache
+from slr_helper.index import InvertedIndex, MappedIndex, parse_query
+from slr_helper.quality import FrameQuality
+from slr_helper.utils import row_equals, get_matcher
+
+SHARED_VERSION = 1
+META_FILE = 'meta.pkl'
+INDEX_DIR = 'index'
+# memory for memoized sub query results per process, see evaluation.ResultCache
+CACHE_BYTES = 64 << 20
+TEXT_COLUMNS = ['title', 'abstract', 'keywords']
+SHM_DIR = '/dev/shm'
+
+_worker_corpus = None
+
+
+def _default_directory():
+    return tempfile.mkdtemp(prefix='slr_helper-shared-', dir=SHM_DIR if os.path.isdir(SHM_DIR) else None)
+
+
+class SharedCorpus:
+    """
+    Read-only corpus published once into memory-mapped files (on Linux in /dev/shm, i.e. shared memory), which
+    worker processes attach to without copying: the key hashes of all rows, the text columns as utf-8 buffers with
+    offsets and the postings of an InvertedIndex (see index.MappedIndex). Pickling a SharedCorpus only transfers its
+    directory, so it can be passed to pool workers, which should return small results (e.g. boolean vectors) only.
+
+    Example:
+        with SharedCorpus.create(corpus.to_frame()) as shared:
+            stats = shared.evaluate(FrameQuality(core_df), queries, workers=8)
+    """
+
+    def __init__(self, directory, owner=False):
+        """
+        Attaches to the corpus published in directory, see create.
+        """
+        self.directory = directory
+        self.owner = owner
+        with open(os.path.join(directory, META_FILE), 'rb') as file:
+            meta = pickle.load(file)
+        if meta['version'] != SHARED_VERSION:
+            raise ValueError(f'{directory} has version {meta["version"]}, expected {SHARED_VERSION}')
+        self.n_rows = meta['n_rows']
+        self.columns = meta['columns']
+        self.matcher = meta['matcher']
+        self._arrays = {}
+        self._index = None
+        self._cache = None
+        self.key_hashes = self._load_('keys')
+        self.has_key = self._load_('has_key')
+
+    @classmethod
+    def create(cls, frame: pd.DataFrame, columns=TEXT_COLUMNS, equal_func=row_equals, directory=None,
+               index: InvertedIndex = None) -> 'SharedCorpus':
+        """
+        Publishes the key hashes, the text columns and the index of frame. Rows are identified by their position in
+        frame.
+
+        :param columns: text columns to publish (missing ones are skipped).
+        :param equal_func: a key based strategy such as the default Util.row_equals or dedup.KeyMatcher
+        :param directory: empty directory for the files. Default: a new directory in /dev/shm or the temporary
+                          directory, which is removed by unlink (or when leaving the with block).
+        :param index: an InvertedIndex of exactly the rows of frame, built if not given.
+        """
+        matcher = get_matcher(equal_func)
+        if not hasattr(matcher, 'keys'):
+            raise ValueError('A shared corpus requires a key based equal_func, e.g. dedup.KeyMatcher')
+        if index is None:
+            index = InvertedIndex()
+            index.add(frame)
+        elif len(index) != len(frame):
+            raise ValueError(f'The index contains {len(index)} rows, but the frame {len(frame)}')
+        owner = directory is None
+        directory = _default_directory() if owner else directory
+        os.makedirs(directory, exist_ok=True)
+
+        keys = matcher.keys(frame)
+        has_key = keys.notna().to_numpy()
+        hashes = np.zeros(len(frame), dtype=np.uint64)
+        hashes[has_key] = hash_keys(keys[has_key])
+        np.save(os.path.join(directory, 'keys.npy'), hashes)
+        np.save(os.path.join(directory, 'has_key.npy'), has_key)
+
+        columns = [col for col in columns if col in frame.columns]
+        for col in columns:
+            has_value = (frame[col].map(type) == str).to_numpy()
+            encoded = frame[col].where(has_value, '').str.encode('utf-8')
+            offsets = np.zeros(len(frame) + 1, dtype=np.int64)
+            np.cumsum(encoded.str.len().to_numpy(), out=offsets[1:])
+            np.save(os.path.join(directory, f'{col}.data.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            np.save(os.path.join(directory, f'{col}.offsets.npy'), offsets)
+            np.save(os.path.join(directory, f'{col}.has_value.npy'), has_value)
+
+        index.save_mapped(os.path.join(directory, INDEX_DIR))
+
+        # the metadata is written last, it marks the corpus as complete
+        with open(os.path.join(directory, META_FILE), 'wb') as file:
+            pickle.dump({'version': SHARED_VERSION, 'n_rows': len(frame), 'columns': columns, 'matcher': matcher},
+                        file)
+        return cls(directory, owner=owner)
+
+    def _load_(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, f'{name}.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    def __reduce__(self):
+        return SharedCorpus, (self.directory,)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+        return False
+
+    def unlink(self):
+        """
+        Removes the files if this instance created them. Attached workers keep their mappings until they exit.
+        """
+        if self.owner:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.owner = False
+
+    def get_texts(self, col, rows=None) -> list:
+        """
+        Decodes the texts of col (None for missing values) of the rows at the positions rows (default: all rows).
+        """
+        data, offsets, has_value = self._load_(f'{col}.data'), self._load_(f'{col}.offsets'), \
+            self._load_(f'{col}.has_value')
+        rows = range(self.n_rows) if rows is None else rows
+        return [bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8') if has_value[i] else None for i in rows]
+
+    def get_frame(self, rows=None, columns=None) -> pd.DataFrame:
+        """
+        :return: frame of the text columns (default: all published) of the rows at the positions rows.
+        """
+        rows = np.arange(self.n_rows) if rows is None else np.asarray(rows)
+        return pd.DataFrame({col: self.get_texts(col, rows) for col in (columns or self.columns)}, index=rows)
+
+    def get_key_hashes(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        :return: the key hashes of the rows of frame with a key, computed like the ones of the corpus.
+        """
+        keys = self.matcher.keys(frame)
+        return hash_keys(keys[keys.notna()])
+
+    @property
+    def index(self) -> MappedIndex:
+        if self._index is None:
+            self._index = MappedIndex(os.path.join(self.directory, INDEX_DIR))
+        return self._index
+
+    def get_rows(self, query: str) -> np.ndarray:
+        """
+        :return: the sorted positions of the rows matching query; sub query results are memoized per process.
+        """
+        if self._cache is None:
+            self._cache = ResultCache(CACHE_BYTES)
+        return self.index.evaluate(parse_query(query), self._cache)
+
+    def map(self, func, tasks, workers=None, chunksize=1) -> list:
+        """
+        Runs func(shared_corpus, task) for every task in a process pool, whose workers attach to the corpus once.
+
+        :param func: module level function (it is pickled), returning a small result.
+        :param chunksize: tasks sent to a worker at once.
+        :return: the results in the order of tasks.
+        """
+        tasks = list(tasks)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_, initargs=(self.directory,)) as executor:
+            return list(executor.map(_run_, [func] * len(tasks), tasks, chunksize=chunksize))
+
+    def get_core_pairs(self, quality: FrameQuality) -> tuple:
+        """
+        Matches the core papers by the key strategy of the shared corpus (the equal_func of create).
+
+        :return: 2-tuple (rows, cores) of arrays, such that the row at position rows[i] is the core paper cores[i],
+                 sorted by row.
+        """
+        keys = self.matcher.keys(quality.core_frame).reset_index(drop=True)
+        has_key = keys.notna().to_numpy()
+        core_hashes = np.zeros(len(keys), dtype=np.uint64)
+        core_hashes[has_key] = hash_keys(keys[has_key])
+        key_hashes = np.asarray(self.key_hashes)
+        candidates = np.flatnonzero(np.asarray(self.has_key) & np.isin(key_hashes, core_hashes[has_key]))
+        rows, cores = [], []
+        for core in np.flatnonzero(has_key):
+            matching = candidates[key_hashes[candidates] == core_hashes[core]]
+            rows.append(matching)
+            cores.append(np.full(len(matching), core))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rows, cores = np.concatenate(rows), np.concatenate(cores)
+        order = np.argsort(rows, kind='stable')
+        return rows[order], cores[order]
+
+    def get_coverage_matrix(self, quality: FrameQuality, queries: list, workers=None) -> pd.DataFrame:
+        """
+        Parallel QueryEvaluator.get_coverage_matrix: the workers evaluate the queries on the shared index and return
+        one boolean vector over the core papers per query.
+
+        :return: boolean DataFrame with one row per query and one column per core paper.
+        """
+        matrix, _ = self._evaluate_(quality, queries, workers)
+        return pd.DataFrame(matrix, index=pd.Index(queries, name='query'), columns=quality.core_frame.index)
+
+    def evaluate(self, quality: FrameQuality, queries: list, workers=None) -> pd.DataFrame:
+        """
+        Parallel QueryEvaluator.evaluate. The hit stats of quality are updated as if FrameQuality.get_core_coverage
+        was called with the result of each query.
+
+        :return: DataFrame indexed by query with the columns size, found and coverage, see QueryEvaluator.evaluate
+        """
+        matrix, sizes = self._evaluate_(quality, queries, workers)
+        found = matrix.sum(axis=1)
+        return pd.DataFrame({'size': sizes, 'found': found, 'coverage': found / len(quality.core_frame)},
+                            index=pd.Index(queries, name='query'))
+
+    def _evaluate_(self, quality, queries, workers):
+        queries = list(queries)
+        rows, cores = self.get_core_pairs(quality)
+        n_cores = len(quality.core_frame)
+        tasks = [(query, rows, cores, n_cores) for query in queries]
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        results = self.map(_query_coverage_, tasks, workers=workers, chunksize=chunksize)
+        sizes = np.array([size for size, _ in results], dtype=np.int64)
+        matrix = np.array([found for _, found in results], dtype=bool).reshape(len(queries), n_cores)
+
+        hits = matrix.sum(axis=0)
+        quality.hit = [h + int(n) for h, n in zip(quality.hit, hits)]
+        return matrix, sizes
+
+
+def _attach_(directory):
+    global _worker_corpus
+    _worker_corpus = SharedCorpus(directory)
+
+
+def _run_(func, task):
+    return func(_worker_corpus, task)
+
+
+def _query_coverage_(shared, task):
+    """
+    :return: 2-tuple (number of matching rows, boolean vector of the core papers found by the query)
+    """
+    query, core_rows, core_ids, n_cores = task
+    rows = shared.get_rows(query)
+    found = np.zeros(n_cores, dtype=bool)
+    if len(core_rows) and len(rows):
+        positions = np.searchsorted(rows, core_rows)
+        positions[positions == len(rows)] = 0
+        found[core_ids[rows[positions] == core_rows]] = True
+    return len(rows), found
@@ -1,6 +1,18 @@
+import os
+import json
 import time
+import threading
+import numpy as np
 import pandas as pd
 from urllib import request
+from urllib.parse import quote
+from urllib.error import HTTPError
+
+from slr_helper import instrumentation
+from slr_helper.dedup import DEFAULT_MATCHER, KeyHashSet
+
+CROSSREF_URL = 'https://api.crossref.org/works/'
+
 
 def row_equals(a, b):
     """
@@ -9,11 +21,34 @@ def row_equals(a, b):
     return a['title'].lower() == b['title'].lower()
 
 
-def get_refcount_from_doi(x):
+def get_cache_dir():
+    """
+    Directory of slr_helper's on-disk caches. Set the environment variable SLR_HELPER_CACHE_DIR to change it.
+    """
+    return os.environ.get('SLR_HELPER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'slr_helper'))
+
+
+def get_refcount_from_doi(x, base_url=CROSSREF_URL, timeout=10, not_found_value=-1):
+    """
+    :param not_found_value: returned if Crossref rejects the DOI (HTTP 4xx except 429, e.g. 404 for an unknown DOI),
+                            i.e. a retry will fail as well.
+    :return: the refcount of the DOI x, not_found_value or -1 on any other failure (e.g. timeout, 5xx or 429).
+    """
+    instrumentation.count('crossref.requests')
+    # DOIs may contain e.g. '#', '?', '<' or spaces (SICI DOIs), which would otherwise change the requested resource
+    url = base_url + quote(x, safe='/')
     try:
-        r = request.get(f'http://api.crossref.org/works/{x}')
-        return r.json()['message']['is-referenced-by-count']
-    except:
+        with instrumentation.span('crossref.request'):
+            with request.urlopen(url, timeout=timeout) as r:
+                return json.load(r)['message']['is-referenced-by-count']
+    except HTTPError as e:
+        if 400 <= e.code < 500 and e.code != 429:
+            instrumentation.count('crossref.not_found')
+            return not_found_value
+        instrumentation.count('crossref.failures')
+        return -1
+    except Exception:
+        instrumentation.count('crossref.failures')
         return -1
 
 
@@ -26,6 +61,60 @@ def retry_if_failed(func, param, tries, wait, fail_value):
     return fail_value
 
 
+def retry_with_backoff(func, param, tries, wait, fail_value, max_wait=60):
+    """
+    Like retry_if_failed, but the waiting time doubles after every failed try (wait, 2 * wait, 4 * wait, ...) up to
+    max_wait. There is no waiting after the last try.
+    """
+    for i in range(tries):
+        val = func(param)
+        if val != fail_value:
+            return val
+        if i < tries - 1:
+            instrumentation.count('utils.retries')
+            time.sleep(min(wait * 2 ** i, max_wait))
+    return fail_value
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: acquire() blocks until a call is allowed, such that at most rate calls per second (plus
+    an initial burst) pass.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def get_matcher(equal_func):
+    """
+    Returns the duplicate detection strategy (an object providing find_duplicate_indices and
+    find_duplicate_indices_two_frames, e.g. dedup.KeyMatcher) to use for equal_func or None if equal_func is a plain
+    (row, row) -> bool function which can only be evaluated pairwise.
+    """
+    if equal_func is row_equals:
+        return DEFAULT_MATCHER
+    if hasattr(equal_func, 'find_duplicate_indices'):
+        return equal_func
+    return None
+
+
 class Util:
 
     @staticmethod
@@ -43,15 +132,24 @@ class Util:
     def find_duplicate_indices(frame: pd.DataFrame, equal_func=row_equals) -> list:
         """
         Searches for all duplicate rows in the frame. For comparison of two rows the function given in
-        equal_func(row->bool) is used.
+        equal_func(row->bool) is used. If equal_func is the default row_equals or a strategy such as dedup.KeyMatcher,
+        the rows are hashed by key instead of being compared pairwise.
         :return:  a list of indices which are duplicates (not including the fist/original occurrence of each duplicate)
         """
+        matcher = get_matcher(equal_func)
+        instrumentation.count('dedup.rows', len(frame))
+        if matcher is not None:
+            with instrumentation.span('dedup.find_duplicates'):
+                return matcher.find_duplicate_indices(frame)
+
         duplicates = []
         length = len(frame)
-        for i in range(length - 1):
-            for j in range(i + 1, length):
-                if equal_func(frame.iloc[i], frame.iloc[j]):
-                    duplicates.append(j)
+        with instrumentation.span('dedup.find_duplicates_pairwise'):
+            for i in range(length - 1):
+                for j in range(i + 1, length):
+                    if equal_func(frame.iloc[i], frame.iloc[j]):
+                        duplicates.append(j)
+        instrumentation.count('dedup.comparisons', length * (length - 1) // 2)
         return duplicates
 
     @staticmethod
@@ -67,13 +165,23 @@ class Util:
                               frame2 has contains a certain entry multiple times, it will be reported at most once.
         :return: a list of 2-tuple (int, int) of duplicates with the indexes of (frame1, frame2)
         """
+        matcher = get_matcher(equal_func)
+        instrumentation.count('dedup.rows', len(frame1) + len(frame2))
+        if matcher is not None:
+            with instrumentation.span('dedup.find_duplicates_two_frames'):
+                return matcher.find_duplicate_indices_two_frames(frame1, frame2, short_circuit=short_circuit)
+
         duplicates = []
-        for i in range(len(frame1)):
-            for j in range(len(frame2)):
-                if equal_func(frame1.iloc[i], frame2.iloc[j]):
-                    duplicates.append((i, j))
-                    if short_circuit:
-                        break
+        comparisons = 0
+        with instrumentation.span('dedup.find_duplicates_two_frames_pairwise'):
+            for i in range(len(frame1)):
+                for j in range(len(frame2)):
+                    comparisons += 1
+                    if equal_func(frame1.iloc[i], frame2.iloc[j]):
+                        duplicates.append((i, j))
+                        if short_circuit:
+                            break
+        instrumentation.count('dedup.comparisons', comparisons)
         return duplicates
 
     @staticmethod
@@ -86,7 +194,10 @@ class Util:
         :return: Copy of frame without duplicates.
         """
         duplicates = Util.find_duplicate_indices(frame, equal_func=equal_func)
-        return frame.drop(duplicates)
+        # the rows are dropped by position, as the index may contain duplicate labels (e.g. after pd.concat)
+        keep = np.ones(len(frame), dtype=bool)
+        keep[duplicates] = False
+        return frame.iloc[keep]
 
     @staticmethod
     def merge_frames(frames: list, equal_func=row_equals) -> pd.DataFrame:
@@ -95,6 +206,37 @@ class Util:
 
         :param frames: list of pd.Dataframes with the same columns
         :param equal_func: The function (row -> bool) used to determine if two rows are equal. Default: Util.row_equals
+                           Use dedup.NearDuplicateMatcher() to also merge near-duplicates (similar titles); its
+                           find_matches(frame) returns the scores of the matched pairs.
+
+        For inputs which do not fit into memory see external_dedup.drop_duplicates_external.
         """
         frame = Util.concatenate_frames(frames)
         return Util.drop_duplicates(frame, equal_func=equal_func)
+
+    @staticmethod
+    def drop_duplicates_stream(chunks, equal_func=row_equals):
+        """
+        Generator consuming the frames in chunks (e.g. Parser.get_df_chunks) one at a time and yielding each of them
+        without the rows already contained in the same or a previous chunk. Only a 64-bit hash of the key of every
+        yielded row is kept in memory.
+
+        :param chunks: iterable of pd.DataFrames with the same columns
+        :param equal_func: a key based strategy such as the default Util.row_equals or dedup.KeyMatcher
+        """
+        matcher = get_matcher(equal_func)
+        if not hasattr(matcher, 'keys'):
+            raise ValueError('Deduplicating a stream requires a key based equal_func, e.g. dedup.KeyMatcher')
+        seen = KeyHashSet()
+        for chunk in chunks:
+            keep, hashes = seen.filter_new(matcher.keys(chunk))
+            seen.update(hashes)
+            yield chunk[keep]
+
+    @staticmethod
+    def merge_frame_stream(chunks, equal_func=row_equals) -> pd.DataFrame:
+        """
+        Creates a new, duplicate free DataFrame from the chunks, see drop_duplicates_stream. Unlike merge_frames, the
+        chunks are never held in memory at the same time including their duplicates.
+        """
+        return Util.concatenate_frames(list(Util.drop_duplicates_stream(chunks, equal_func=equal_func)))